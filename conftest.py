@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """Дожидается фоновых пулов картинок и лент до очистки тестовой базы.
+
+    После коммита пулы пишут в базу из своих потоков; если тест уже
+    закончился, запись сталкивается с flush и таблица оказывается занята.
+    """
+    yield
+    from posts.tests.utils import drain_background_pools
+    drain_background_pools()
@@ -0,0 +1,85 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.template.loader import get_template
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from api.serializers import POST
+from core.benchmark import benchmark_database, measure
+from posts.models import Post
+from posts.synthetic import Generator
+
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает сериализацию постов в JSON из кортежей с рендером '
+        'HTML-карточек и страницы ленты'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument(
+            '--batch', type=int, default=100,
+            help='Сколько постов сериализуется за один замер'
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        batch, repeat = options['batch'], options['repeat']
+        with benchmark_database():
+            Generator(users=200, posts=options['posts'], hot_comments=0).run()
+            names = POST.select()
+            card = get_template('includes/post.html')
+
+            def values_json():
+                rows = Post.objects.values_list(*POST.lookups(names))[:batch]
+                json.dumps(POST.serialize(rows, names), cls=DjangoJSONEncoder)
+
+            def instances_json():
+                posts = Post.objects.for_feed()[:batch]
+                json.dumps([{
+                    'id': post.pk,
+                    'text': post.text,
+                    'created': post.created,
+                    'modified': post.modified,
+                    'author': post.author.username,
+                    'group': post.group and post.group.slug,
+                    'image': post.image.url if post.image else None,
+                    'comments_count': post.comments_count,
+                } for post in posts], cls=DjangoJSONEncoder)
+
+            def html_cards():
+                for post in Post.objects.for_feed()[:batch]:
+                    card.render({'post': post})
+
+            self.stdout.write(f'{"serializer":>16} {"posts/s":>9}')
+            for name, func in (
+                ('values → JSON', values_json),
+                ('models → JSON', instances_json),
+                ('models → HTML', html_cards),
+            ):
+                stats = measure(func, repeat)
+                self.stdout.write(
+                    f'{name:>16} {batch / stats["median"] * 1000:>9.0f}'
+                )
+            self.compare_views(repeat)
+
+    def compare_views(self, repeat):
+        """Целые страницы одного размера без кэша страниц и карточек."""
+        client = Client(REMOTE_ADDR='10.0.0.1')
+        with override_settings(CACHES=DUMMY_CACHES):
+            self.stdout.write(f'{"view":>16} {"median, ms":>11}')
+            for name, url in (
+                ('api posts', reverse('api:posts')),
+                ('html index', reverse('posts:main_page')),
+            ):
+                stats = measure(
+                    lambda: client.get(url, {'limit': 10}), repeat
+                )
+                self.stdout.write(f'{name:>16} {stats["median"]:>11.2f}')
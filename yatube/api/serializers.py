@@ -0,0 +1,99 @@
+"""Быстрая сериализация для API: кортежи values_list вместо моделей.
+
+Ресурс описывает публичные поля: имя в API, поле запроса и, если нужно,
+преобразование значения. ?fields= выбирает подмножество полей, и в
+SELECT попадают только их столбцы, а JOIN — только нужные.
+"""
+from posts.storage import post_image_storage
+from posts.utils import CursorPaginator
+
+
+class FieldsError(ValueError):
+    """В ?fields= есть поле, которого у ресурса нет."""
+
+
+def image_url(name):
+    return post_image_storage.url(name) if name else None
+
+
+class Resource:
+    def __init__(self, **fields):
+        # Имя в API → (поле для values_list, преобразование или None).
+        self.fields = {
+            name: field if isinstance(field, tuple) else (field, None)
+            for name, field in fields.items()
+        }
+
+    def select(self, requested=None):
+        """Имена полей из ?fields= в порядке запроса; без него — все."""
+        if not requested:
+            return list(self.fields)
+        names = list(dict.fromkeys(
+            name.strip() for name in requested.split(',') if name.strip()
+        ))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise FieldsError(', '.join(unknown))
+        return names
+
+    def lookups(self, names):
+        return [self.fields[name][0] for name in names]
+
+    def serialize(self, rows, names, offset=0):
+        """Словари для JSON из кортежей; первые offset столбцов служебные."""
+        plain = [
+            (name, index) for index, name in enumerate(names, offset)
+            if self.fields[name][1] is None
+        ]
+        converted = [
+            (name, index, self.fields[name][1])
+            for index, name in enumerate(names, offset)
+            if self.fields[name][1] is not None
+        ]
+        items = []
+        for row in rows:
+            item = {name: row[index] for name, index in plain}
+            for name, index, convert in converted:
+                item[name] = convert(row[index])
+            items.append(item)
+        return items
+
+
+class ValuesCursorPaginator(CursorPaginator):
+    """Курсорная пагинация по кортежам, начинающимся с (дата, id)."""
+
+    def position(self, row):
+        return row[0], row[1]
+
+
+POST = Resource(
+    id='id',
+    text='text',
+    created='created',
+    modified='modified',
+    author='author__username',
+    group='group__slug',
+    image=('image', image_url),
+    comments_count='comments_count',
+)
+COMMENT = Resource(
+    id='id',
+    post='post_id',
+    author='author__username',
+    text='text',
+    created='created',
+)
+GROUP = Resource(
+    slug='slug',
+    title='title',
+    description='description',
+)
+PROFILE = Resource(
+    username='username',
+    first_name='first_name',
+    last_name='last_name',
+    posts_count='stats__posts_count',
+    follows_count='stats__follows_count',
+    followers_count='stats__followers_count',
+    comments_count='stats__comments_count',
+)
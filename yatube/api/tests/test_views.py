@@ -0,0 +1,104 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+@override_settings(API_PAGE_SIZE=3)
+class ApiViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='api_author')
+        cls.reader = User.objects.create_user(username='api_reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='api-group', description='-'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Коммент'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_feed_is_paginated_by_cursor(self):
+        """Лента отдаётся страницами по курсору без повторов"""
+        first = self.client.get(reverse('api:posts')).json()
+        self.assertEqual(len(first['results']), 3)
+        second = self.client.get(first['next']).json()
+        self.assertIsNone(second['next'])
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEqual(ids, [post.pk for post in reversed(self.posts)])
+
+    def test_sparse_fieldsets(self):
+        """?fields= оставляет только нужные поля и лишние JOIN не делает"""
+        # Счётчик версий для ETag и сама страница.
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse('api:posts'), {'fields': 'text,id'}
+            )
+        self.assertEqual(
+            list(response.json()['results'][0]), ['text', 'id']
+        )
+        response = self.client.get(reverse('api:posts'), {'fields': 'x'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_objects(self):
+        post = self.posts[0]
+        data = self.client.get(reverse('api:post', args=[post.pk])).json()
+        self.assertEqual(data['author'], 'api_author')
+        self.assertEqual(data['group'], 'api-group')
+        self.assertEqual(data['comments_count'], 1)
+        comments = self.client.get(
+            reverse('api:comments', args=[post.pk])
+        ).json()['results']
+        self.assertEqual(comments[0]['author'], 'api_reader')
+        profile = self.client.get(
+            reverse('api:profile', args=['api_author'])
+        ).json()
+        self.assertEqual(profile['posts_count'], 5)
+        self.assertEqual(profile['followers_count'], 1)
+        groups = self.client.get(reverse('api:groups')).json()['results']
+        self.assertEqual(groups[0]['slug'], 'api-group')
+        group_posts = self.client.get(
+            reverse('api:group_posts', args=['api-group'])
+        ).json()
+        self.assertEqual(len(group_posts['results']), 3)
+        for url in (
+            reverse('api:post', args=[0]),
+            reverse('api:comments', args=[0]),
+            reverse('api:profile', args=['nobody']),
+            reverse('api:group_posts', args=['nothing']),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+                self.assertIn('detail', response.json())
+
+    def test_follow_feed_requires_login(self):
+        url = reverse('api:follow')
+        self.assertEqual(
+            self.client.get(url).status_code, HTTPStatus.UNAUTHORIZED
+        )
+        self.client.force_login(self.reader)
+        results = self.client.get(url).json()['results']
+        self.assertEqual(results[0]['id'], self.posts[-1].pk)
+
+    def test_conditional_get(self):
+        """Неизменившаяся лента отвечает 304"""
+        response = self.client.get(reverse('api:posts'))
+        response = self.client.get(
+            reverse('api:posts'), HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
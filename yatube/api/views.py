@@ -0,0 +1,148 @@
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from core.replicas import use_replica
+from posts.caching import conditional_feed
+from posts.feed import FEED_CREATED, feed_posts
+from posts.models import Comment, Group, Post, User
+from posts.stats import get_stats
+from posts.utils import CURSOR_PARAM
+
+from .serializers import (
+    COMMENT, GROUP, POST, PROFILE, FieldsError, ValuesCursorPaginator
+)
+
+
+def error(status, detail):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+def api_view(view_func):
+    """Только GET, чтение с реплики и ошибки ?fields= в виде 400."""
+    @require_GET
+    @use_replica
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except FieldsError as unknown:
+            return error(400, f'Неизвестные поля: {unknown}')
+    return wrapper
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        size = settings.API_PAGE_SIZE
+    return max(1, min(size, settings.API_MAX_PAGE_SIZE))
+
+
+def feed_response(request, queryset, resource, created_field='created'):
+    """Страница ленты по курсору: {"results": [...], "next": адрес}."""
+    names = resource.select(request.GET.get('fields'))
+    # Дата и id нужны курсору, даже если их не просили.
+    rows = queryset.values_list(
+        created_field, 'pk', *resource.lookups(names)
+    )
+    paginator = ValuesCursorPaginator(rows, _page_size(request), created_field)
+    page, next_cursor, _ = paginator.cursor_page(
+        request.GET.get(CURSOR_PARAM)
+    )
+    next_url = None
+    if next_cursor:
+        params = request.GET.copy()
+        params[CURSOR_PARAM] = next_cursor
+        next_url = f'{request.path}?{params.urlencode()}'
+    return JsonResponse({
+        'results': resource.serialize(page, names, offset=2),
+        'next': next_url,
+    })
+
+
+def object_response(request, queryset, resource):
+    names = resource.select(request.GET.get('fields'))
+    row = queryset.values_list(*resource.lookups(names)).first()
+    if row is None:
+        return error(404, 'Не найдено')
+    return JsonResponse(resource.serialize([row], names)[0])
+
+
+@api_view
+@conditional_feed(lambda: ['index'])
+def posts(request):
+    return feed_response(request, Post.objects.all(), POST)
+
+
+@api_view
+@conditional_feed(lambda post_id: [f'post:{post_id}'])
+def post(request, post_id):
+    return object_response(request, Post.objects.filter(pk=post_id), POST)
+
+
+@api_view
+@conditional_feed(lambda post_id: [f'post:{post_id}'])
+def comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return error(404, 'Не найдено')
+    return feed_response(
+        request, Comment.objects.filter(post=post_id), COMMENT
+    )
+
+
+@api_view
+def groups(request):
+    """Все группы: их немного, поэтому без пагинации."""
+    names = GROUP.select(request.GET.get('fields'))
+    rows = Group.objects.order_by('pk').values_list(*GROUP.lookups(names))
+    return JsonResponse({'results': GROUP.serialize(rows, names)})
+
+
+@api_view
+@conditional_feed(lambda slug: [f'group:{slug}'])
+def group_posts(request, slug):
+    if not Group.objects.filter(slug=slug).exists():
+        return error(404, 'Не найдено')
+    return feed_response(
+        request, Post.objects.filter(group__slug=slug), POST
+    )
+
+
+@api_view
+@conditional_feed(lambda username: [f'profile:{username}'])
+def profile(request, username):
+    author = User.objects.filter(username=username)
+    if author.filter(stats=None).exists():
+        # Счётчики создаются при первом обращении, как на странице профиля.
+        get_stats(author.get())
+    return object_response(request, author, PROFILE)
+
+
+@api_view
+@conditional_feed(lambda username: [f'profile:{username}'])
+def profile_posts(request, username):
+    if not User.objects.filter(username=username).exists():
+        return error(404, 'Не найдено')
+    return feed_response(
+        request, Post.objects.filter(author__username=username), POST
+    )
+
+
+def api_login_required(view_func):
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error(401, 'Нужно войти')
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+@api_view
+@api_login_required
+def follow(request):
+    return feed_response(
+        request, feed_posts(request.user), POST, created_field=FEED_CREATED
+    )
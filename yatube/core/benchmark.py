@@ -0,0 +1,132 @@
+import http.client
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer, WSGIRequestHandler
+)
+from django.db import connection
+from django.test import override_settings
+
+
+@contextmanager
+def benchmark_database(name=None):
+    """Создаёт временную тестовую БД и удаляет её после замеров.
+
+    name задаёт файл БД для SQLite, когда к базе обращаются несколько
+    процессов; без него SQLite создаёт базу в памяти.
+    """
+    old_name = connection.settings_dict['NAME']
+    if name is not None:
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def percentile(timings, fraction):
+    """Перцентиль по отсортированному списку замеров."""
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+
+def summarize(timings):
+    """Сводка задержек в мс: медиана, p99 и максимум."""
+    timings = sorted(timings)
+    return {
+        'median': statistics.median(timings),
+        'p99': percentile(timings, 0.99),
+        'max': timings[-1],
+    }
+
+
+def measure(func, repeat=20):
+    """Вызывает func repeat раз и возвращает статистику задержек в мс."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_load(urls, requests, concurrency):
+    """Гоняет запросы через настоящий многопоточный WSGI-сервер.
+
+    Тестовый Client не закрывает соединения в конце запроса, поэтому
+    для замера нужен сервер, как у runserver: поток на каждый запрос.
+    Адреса urls запрашиваются по кругу. Возвращает запросы в секунду
+    и задержки в мс.
+    """
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler)
+    server.set_app(WSGIHandler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    counter = iter(range(requests))
+    timings = []
+    lock = threading.Lock()
+
+    def load():
+        while True:
+            with lock:
+                number = next(counter, None)
+            if number is None:
+                return
+            start = time.perf_counter()
+            client = http.client.HTTPConnection(host, port)
+            client.request(
+                'GET', urls[number % len(urls)],
+                headers={'Connection': 'close'}
+            )
+            client.getresponse().read()
+            client.close()
+            with lock:
+                timings.append((time.perf_counter() - start) * 1000)
+
+    # Иначе для 127.0.0.1 включится debug_toolbar.
+    with override_settings(INTERNAL_IPS=[]):
+        start = time.perf_counter()
+        workers = [
+            threading.Thread(target=load) for _ in range(concurrency)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+    return requests / elapsed, timings
+
+
+def find_regressions(baseline, current, threshold):
+    """Сравнивает замеры двух прогонов по представлениям.
+
+    Регрессия — медиана выросла больше чем в 1 + threshold раз
+    или запросов к базе стало больше. Представления, которых нет
+    в одном из прогонов, не сравниваются.
+    """
+    regressions = []
+    for name, result in current.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if result['queries'] > old['queries']:
+            regressions.append(
+                f'{name}: запросов {old["queries"]} → {result["queries"]}'
+            )
+        if result['median'] > old['median'] * (1 + threshold):
+            regressions.append(
+                f'{name}: медиана {old["median"]:.2f} → '
+                f'{result["median"]:.2f} мс'
+            )
+    return regressions
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -11,3 +12,70 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class VersionedModel(models.Model):
+    """Абстрактная модель. Добавляет дату правки и номер версии.
+
+    Версия растёт на каждом save(). Номер считается в Python, поэтому
+    получатели сигналов видят число, а строку не нужно перечитывать.
+    UPDATE сверяет прежнюю версию: если строку успели сохранить из другой
+    копии, приращение делается через F(), и параллельные сохранения не
+    теряются. Массовые update() и bulk_create версию не трогают.
+    """
+    modified = models.DateTimeField(
+        'Дата изменения',
+        default=timezone.now,
+        editable=False,
+        help_text='Обновляется при каждом сохранении'
+    )
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=1,
+        editable=False,
+        help_text='Растёт при каждом сохранении'
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if self._state.adding:
+            return super().save(*args, update_fields=update_fields, **kwargs)
+        self.modified = timezone.now()
+        self._saved_version = self.version
+        self.version += 1
+        if update_fields is not None:
+            update_fields = {*update_fields, 'modified', 'version'}
+        try:
+            super().save(*args, update_fields=update_fields, **kwargs)
+        finally:
+            self._saved_version = None
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        # save_base() без save(), как у loaddata, версию не трогает.
+        saved_version = getattr(self, '_saved_version', None)
+        if saved_version is None:
+            return super()._do_update(
+                base_qs, using, pk_val, values, update_fields, forced_update
+            )
+        if super()._do_update(
+            base_qs.filter(version=saved_version), using, pk_val,
+            values, update_fields, forced_update
+        ):
+            return True
+        # Копия устарела: приращение от той версии, что лежит в базе.
+        values = [
+            (field, model, models.F('version') + 1)
+            if field.attname == 'version' else (field, model, value)
+            for field, model, value in values
+        ]
+        updated = super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
+        if updated:
+            self.version = base_qs.filter(pk=pk_val).values_list(
+                'version', flat=True
+            ).get()
+        return updated
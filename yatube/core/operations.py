@@ -0,0 +1,40 @@
+from django.db.migrations import AddIndex
+
+
+class AddIndexConcurrently(AddIndex):
+    """Создаёт индекс, не блокируя запись в большую таблицу.
+
+    На PostgreSQL индекс строится через CREATE INDEX CONCURRENTLY, поэтому
+    миграция должна быть объявлена с atomic = False. IF NOT EXISTS
+    позволяет безопасно перезапустить миграцию, прерванную на полпути.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        vendor = schema_editor.connection.vendor
+        if vendor not in ('postgresql', 'sqlite'):
+            schema_editor.add_index(model, self.index)
+            return
+        create = 'CREATE INDEX IF NOT EXISTS'
+        if vendor == 'postgresql':
+            create = 'CREATE INDEX CONCURRENTLY IF NOT EXISTS'
+        sql = str(self.index.create_sql(model, schema_editor))
+        schema_editor.execute(sql.replace('CREATE INDEX', create, 1))
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor != 'postgresql':
+            schema_editor.remove_index(model, self.index)
+            return
+        schema_editor.execute('DROP INDEX CONCURRENTLY IF EXISTS {}'.format(
+            schema_editor.quote_name(self.index.name)
+        ))
+
+    def describe(self):
+        return '{} concurrently'.format(super().describe())
@@ -0,0 +1,121 @@
+"""Пул соединений с БД внутри процесса для многопоточных серверов.
+
+Django держит по соединению на поток. Если сервер создаёт поток на
+каждый запрос, постоянные соединения (CONN_MAX_AGE) не помогают: поток
+умирает вместе с соединением. Пул переживает потоки и отдаёт уже
+открытые соединения следующим запросам.
+"""
+import os
+import queue
+import threading
+
+from django.db import DatabaseError
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(DatabaseError):
+    """Все соединения пула заняты дольше TIMEOUT секунд."""
+
+
+class ConnectionPool:
+    """Ограниченный набор открытых DB-API соединений."""
+
+    def __init__(self, size, timeout=10, health_checks=False):
+        self.size = size
+        self.timeout = timeout
+        self.health_checks = health_checks
+        # LIFO: чаще используются одни и те же, «тёплые» соединения.
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self, connect):
+        """Свободное соединение из пула или новое через connect()."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(
+                f'Нет свободных соединений за {self.timeout} с'
+            )
+        try:
+            while True:
+                try:
+                    connection = self._idle.get_nowait()
+                except queue.Empty:
+                    return connect()
+                if not self.health_checks or self._is_usable(connection):
+                    return connection
+                self._close(connection)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection):
+        try:
+            # Незавершённая транзакция не должна достаться другому запросу.
+            connection.rollback()
+        except Exception:
+            self._close(connection)
+        else:
+            self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    def discard(self, connection):
+        self._close(connection)
+        self._slots.release()
+
+    def close_idle(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    @staticmethod
+    def _is_usable(connection):
+        try:
+            connection.cursor().execute('SELECT 1')
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def get_pool(alias, settings_dict):
+    """Пул для псевдонима БД; после fork дочерний процесс заводит свой."""
+    key = (os.getpid(), alias)
+    with _pools_lock:
+        if key not in _pools:
+            options = settings_dict.get('POOL', {})
+            _pools[key] = ConnectionPool(
+                size=options.get('SIZE', 10),
+                timeout=options.get('TIMEOUT', 10),
+                health_checks=settings_dict.get('CONN_HEALTH_CHECKS', False),
+            )
+        return _pools[key]
+
+
+class PooledDatabaseWrapperMixin:
+    """Берёт соединения из пула и возвращает их туда вместо закрытия."""
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        return get_pool(self.alias, self.settings_dict).acquire(
+            lambda: connect(conn_params)
+        )
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = get_pool(self.alias, self.settings_dict)
+        with self.wrap_database_errors:
+            if self.errors_occurred:
+                pool.discard(self.connection)
+            else:
+                pool.release(self.connection)
@@ -0,0 +1,173 @@
+"""Лёгкое профилирование запросов для боевого трафика.
+
+Доля запросов PROFILING_SAMPLE_RATE считает SQL-запросы и их время,
+время рендера шаблонов и попадания в кэш и сверяет число запросов
+с бюджетом представления; остальные идут без обёрток. Заголовок
+Server-Timing получают только такие запросы и только при DEBUG или
+с адресов INTERNAL_IPS: чужим клиентам устройство сайта не показываем.
+В файл PROFILING_LOG попадает одна JSON-строка на профилированный
+запрос. Перцентили по представлениям считает команда profiling_report.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import (
+    DjangoTemplates, Template, reraise
+)
+from django.template.exceptions import TemplateDoesNotExist
+
+logger = logging.getLogger('yatube.profiling')
+
+_current = ContextVar('request_profile', default=None)
+_log_lock = threading.Lock()
+
+
+class RequestProfile:
+    """Счётчики одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._template_depth = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка для connection.execute_wrapper(); запросы могут идти
+        # из нескольких потоков, см. core.reads.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.queries += 1
+                self.sql_ms += elapsed
+
+    def server_timing(self, total_ms):
+        return ', '.join((
+            f'db;dur={self.sql_ms:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+            f'cache;desc="hit {self.cache_hits} miss {self.cache_misses}"',
+            f'total;dur={total_ms:.1f}',
+        ))
+
+
+def record_cache(hits=0, misses=0):
+    """Учитывает обращения к кэшу в профиле текущего запроса."""
+    profile = _current.get()
+    if profile is not None:
+        profile.cache_hits += hits
+        profile.cache_misses += misses
+
+
+@contextmanager
+def timed_render():
+    """Меряет рендер шаблона; вложенные шаблоны входят во внешний."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    profile._template_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile._template_depth -= 1
+        if not profile._template_depth:
+            profile.template_ms += (time.perf_counter() - start) * 1000
+
+
+class ProfiledTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed_render():
+            return super().render(context, request)
+
+
+class ProfilingTemplates(DjangoTemplates):
+    """Бэкенд шаблонов Django, который учитывает время рендера."""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(
+            self.engine.from_string(template_code), self
+        )
+
+    def get_template(self, template_name):
+        try:
+            return ProfiledTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+@contextmanager
+def profile_queries():
+    """Учитывает запросы соединений текущего потока в профиле запроса."""
+    profile = _current.get()
+    with ExitStack() as stack:
+        if profile is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+        yield
+
+
+def _write_sample(sample):
+    line = json.dumps(sample, ensure_ascii=False)
+    with _log_lock, open(settings.PROFILING_LOG, 'a') as log:
+        log.write(line + '\n')
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        profile = RequestProfile()
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            with profile_queries():
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+        if (settings.DEBUG
+                or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS):
+            response['Server-Timing'] = profile.server_timing(total_ms)
+        match = request.resolver_match
+        view = match.view_name if match else None
+        self.check_budget(view, profile)
+        if view and settings.PROFILING_LOG:
+            _write_sample({
+                'view': view,
+                'status': response.status_code,
+                'total_ms': round(total_ms, 2),
+                'sql_ms': round(profile.sql_ms, 2),
+                'template_ms': round(profile.template_ms, 2),
+                'queries': profile.queries,
+                'cache_hits': profile.cache_hits,
+                'cache_misses': profile.cache_misses,
+                'time': time.time(),
+            })
+        return response
+
+    @staticmethod
+    def check_budget(view, profile):
+        budget = settings.QUERY_BUDGETS.get(view)
+        if budget is not None and profile.queries > budget:
+            logger.warning(
+                'Бюджет запросов превышен: %s сделал %d из %d',
+                view, profile.queries, budget
+            )
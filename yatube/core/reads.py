@@ -0,0 +1,72 @@
+"""Параллельные чтения внутри одного запроса.
+
+Django 2.2 не умеет асинхронные представления, поэтому независимые
+запросы страницы — выборка постов, проверка подписки, счётчики —
+выполняются в пуле потоков. У каждого потока своё соединение с базой,
+и при медленной базе задержка страницы равна самому долгому запросу,
+а не их сумме.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from core.profiling import profile_queries
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _readers():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PARALLEL_READ_WORKERS,
+                thread_name_prefix='db-reader'
+            )
+        return _executor
+
+
+def _read(func):
+    try:
+        with profile_queries():
+            return func()
+    finally:
+        # Поток пула живёт долго, а request_finished в нём не приходит:
+        # закрываем то, что закрыл бы конец запроса. Постоянное соединение
+        # (CONN_MAX_AGE) остаётся, а соединение из core.pool (его
+        # CONN_MAX_AGE = 0) возвращается в пул.
+        close_old_connections()
+
+
+def run_parallel(*funcs):
+    """Вызывает функции чтения параллельно и возвращает их результаты.
+
+    Функции должны сами вычислять QuerySet, иначе запрос выполнится
+    позже в вызывающем потоке. Первая функция выполняется в текущем
+    потоке. Внутри транзакции всё выполняется по очереди на месте:
+    другие соединения не видят её незафиксированных данных.
+    Контекст (реплика, профиль запроса) передаётся в потоки пула.
+    """
+    if (not settings.PARALLEL_READ_WORKERS or len(funcs) < 2
+            or connection.in_atomic_block):
+        return [func() for func in funcs]
+    futures = [
+        _readers().submit(copy_context().run, _read, func)
+        for func in funcs[1:]
+    ]
+    first = funcs[0]()
+    return [first] + [future.result() for future in futures]
+
+
+def stop_readers():
+    """Останавливает пул; следующий вызов создаст его по настройкам."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            return
+        _executor.shutdown()
+        _executor = None
@@ -0,0 +1,77 @@
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Кука «читать с основной базы» после собственной записи пользователя:
+# реплика может ещё не получить его пост или комментарий.
+PIN_COOKIE = 'yatube_primary'
+
+_reading_replica = ContextVar('reading_replica', default=False)
+_wrote = ContextVar('wrote', default=False)
+
+
+class ReplicaRouter:
+    """Чтение представлений с @use_replica идёт на реплики, запись — в default.
+
+    Всё, что вне таких представлений, читается с основной базы.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _reading_replica.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схему на реплики приносит репликация, а не migrate.
+        return db == DEFAULT_DB_ALIAS
+
+
+def mark_written():
+    """Отмечает запись, сделанную за текущий запрос в другом потоке."""
+    _wrote.set(True)
+
+
+def use_replica(view):
+    """Читает данные представления с реплики, если пользователь не писал."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if PIN_COOKIE in request.COOKIES:
+            return view(request, *args, **kwargs)
+        token = _reading_replica.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _reading_replica.reset(token)
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """После записи ставит куку, прижимающую чтение к основной базе."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get():
+                response.set_cookie(
+                    PIN_COOKIE, '1',
+                    max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True,
+                )
+        finally:
+            _wrote.reset(token)
+        return response
@@ -0,0 +1,311 @@
+"""Раздача статики и медиа в обход Django.
+
+collectstatic с CompressedManifestStorage даёт файлам имена с хешем
+содержимого (css/bootstrap.3f2a1c9e0b7d.css) и кладёт рядом сжатые
+копии .gz и, если установлен brotli, .br.
+
+FileServer оборачивает WSGI-приложение и отвечает на запросы к
+STATIC_URL и MEDIA_URL до middleware и URLconf. Статика индексируется
+один раз при старте, медиа проверяются stat на каждый запрос. Файлы с
+хешем в имени — статика из манифеста, картинки posts.storage и
+миниатюры sorl — не меняются и отдаются с Cache-Control: immutable.
+Сжатая копия выбирается по Accept-Encoding; поддержаны If-None-Match,
+If-Modified-Since и один диапазон Range. Медиа можно отдать силами
+веб-сервера: см. MEDIA_SENDFILE.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.handlers.wsgi import get_path_info
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.svg', '.ico', '.txt', '.html', '.json', '.xml'
+)
+# Сжатие, которое экономит меньше 5%, не стоит отдельного файла.
+MIN_COMPRESSION = 0.95
+BLOCK_SIZE = 64 * 1024
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+# Имена медиа по хешу: posts.storage (SHA-256) и миниатюры sorl (MD5).
+HASHED_MEDIA_RE = re.compile(r'(^|/)[0-9a-f]{32,64}\.[^/]+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Сжатые копии рядом с файлом, начиная с предпочтительной.
+ENCODINGS = (('.br', 'br'), ('.gz', 'gzip'))
+SENDFILE_HEADERS = {
+    'x-accel-redirect': 'X-Accel-Redirect',
+    'x-sendfile': 'X-Sendfile',
+}
+
+
+def _compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """Статика с хешем в имени и заранее сжатыми копиями."""
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Статика не собрана (разработка, тесты): отдаём как есть.
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as source:
+            content = source.read()
+        for suffix, compress in _compressors():
+            compressed = compress(content)
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            if len(compressed) < len(content) * MIN_COMPRESSION:
+                self._save(name + suffix, ContentFile(compressed))
+
+
+class StaticFile:
+    """Файл на диске и готовые заголовки для него."""
+
+    def __init__(self, path, immutable, encoding=None):
+        self.path = path
+        self.encoding = encoding
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.mtime = int(stat.st_mtime)
+        self.etag = f'"{self.mtime:x}-{self.size:x}'
+        self.etag += f'-{encoding}"' if encoding else '"'
+        self.cache_control = (
+            IMMUTABLE_CACHE if immutable
+            else f'public, max-age={settings.STATIC_MAX_AGE}'
+        )
+        self.variants = []
+        if encoding is None:
+            for suffix, name in ENCODINGS:
+                if os.path.isfile(path + suffix):
+                    self.variants.append(
+                        StaticFile(path + suffix, immutable, name)
+                    )
+
+    def headers(self, content_type):
+        headers = [
+            ('Content-Type', content_type),
+            ('Last-Modified', http_date(self.mtime)),
+            ('ETag', self.etag),
+            ('Cache-Control', self.cache_control),
+            ('Accept-Ranges', 'bytes'),
+        ]
+        if self.encoding:
+            headers.append(('Content-Encoding', self.encoding))
+        return headers
+
+    def not_modified(self, environ):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return self.etag in {
+                tag.strip() for tag in if_none_match.split(',')
+            } or if_none_match.strip() == '*'
+        since = parse_http_date_safe(
+            environ.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        return since is not None and self.mtime <= since
+
+    def byte_range(self, environ):
+        """Диапазон (начало, длина) из Range; None — весь файл, False — 416."""
+        match = RANGE_RE.match(environ.get('HTTP_RANGE', '').strip())
+        if match is None:
+            # Нет заголовка или несколько диапазонов: отдаём весь файл.
+            return None
+        if_range = environ.get('HTTP_IF_RANGE')
+        if if_range is not None and if_range.strip() != self.etag:
+            return None
+        start, end = match.groups()
+        if not start:
+            if not end or not int(end):
+                return False
+            start = max(self.size - int(end), 0)
+            end = self.size - 1
+        else:
+            start = int(start)
+            end = min(int(end), self.size - 1) if end else self.size - 1
+        if start >= self.size or start > end:
+            return False
+        return start, end - start + 1
+
+
+def _accepts(environ):
+    accepted = set()
+    for part in environ.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = part.partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00'):
+            accepted.add(coding.strip())
+    return accepted
+
+
+def _read(path, start, length):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        while length > 0:
+            chunk = source.read(min(BLOCK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def _content_type(name):
+    content_type, _ = mimetypes.guess_type(name)
+    content_type = content_type or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in (
+        'application/javascript', 'application/json'
+    ):
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+class FileServer:
+    """WSGI-обёртка: статика и медиа отдаются до Django."""
+
+    def __init__(self, application):
+        self.application = application
+        self.static_files = self.index_static()
+
+    @staticmethod
+    def index_static():
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            return {}
+        storage = CompressedManifestStorage()
+        hashed = set(storage.hashed_files.values())
+        variants = tuple(suffix for suffix, _ in ENCODINGS)
+        files = {}
+        for directory, _, names in os.walk(root):
+            for file_name in names:
+                path = os.path.join(directory, file_name)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                if name.endswith(variants) or name == storage.manifest_name:
+                    continue
+                files[name] = StaticFile(path, name in hashed)
+        return files
+
+    def __call__(self, environ, start_response):
+        if environ['REQUEST_METHOD'] in ('GET', 'HEAD'):
+            path = get_path_info(environ)
+            if path.startswith(settings.STATIC_URL):
+                name = path[len(settings.STATIC_URL):]
+                static_file = self.static_files.get(name)
+                if static_file is not None:
+                    return self.serve(
+                        static_file, name, environ, start_response
+                    )
+            elif path.startswith(settings.MEDIA_URL):
+                name = path[len(settings.MEDIA_URL):]
+                found = self.find_media(name)
+                if found is not None:
+                    static_file, sendfile = found
+                    return self.serve(
+                        static_file, name, environ, start_response, sendfile
+                    )
+        return self.application(environ, start_response)
+
+    @staticmethod
+    def find_media(name):
+        """Файл медиа и заголовок передачи веб-серверу, если он задан."""
+        try:
+            path = safe_join(settings.MEDIA_ROOT, name)
+        except SuspiciousFileOperation:
+            # Путь выходит за MEDIA_ROOT: пусть ответит Django.
+            return None
+        if not os.path.isfile(path):
+            return None
+        static_file = StaticFile(path, bool(HASHED_MEDIA_RE.search(name)))
+        header = SENDFILE_HEADERS.get(settings.MEDIA_SENDFILE)
+        if header == 'X-Accel-Redirect':
+            return static_file, (
+                header, settings.MEDIA_ACCEL_PREFIX + quote(name)
+            )
+        if header == 'X-Sendfile':
+            return static_file, (header, path)
+        return static_file, None
+
+    def serve(self, static_file, name, environ, start_response,
+              sendfile=None):
+        content_type = _content_type(name)
+        if sendfile is not None:
+            # Диапазоны и сами байты отдаёт веб-сервер.
+            start_response('200 OK', static_file.headers(content_type) + [
+                sendfile, ('Content-Length', '0'),
+            ])
+            return []
+        byte_range = static_file.byte_range(environ)
+        if byte_range is None:
+            accepted = _accepts(environ)
+            for variant in static_file.variants:
+                if variant.encoding in accepted:
+                    chosen = variant
+                    break
+            else:
+                chosen = static_file
+        else:
+            # Диапазон считается по несжатому файлу.
+            chosen = static_file
+        headers = chosen.headers(content_type)
+        if static_file.variants:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if chosen.not_modified(environ):
+            start_response('304 Not Modified', [
+                header for header in headers
+                if header[0] not in ('Content-Type', 'Content-Encoding')
+            ])
+            return []
+        if byte_range is False:
+            start_response('416 Range Not Satisfiable', [
+                ('Content-Range', f'bytes */{static_file.size}'),
+                ('Content-Length', '0'),
+            ])
+            return []
+        head = environ['REQUEST_METHOD'] == 'HEAD'
+        if byte_range is not None:
+            start, length = byte_range
+            headers += [
+                ('Content-Range',
+                 f'bytes {start}-{start + length - 1}/{static_file.size}'),
+                ('Content-Length', str(length)),
+            ]
+            start_response('206 Partial Content', headers)
+            return [] if head else _read(chosen.path, start, length)
+        headers.append(('Content-Length', str(chosen.size)))
+        start_response('200 OK', headers)
+        if head:
+            return []
+        wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return wrapper(open(chosen.path, 'rb'), BLOCK_SIZE)
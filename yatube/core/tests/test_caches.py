@@ -0,0 +1,20 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from yatube.caches import cache_config
+
+
+class CacheConfigTest(SimpleTestCase):
+    def test_backend_aliases(self):
+        config = cache_config('file', '/tmp/yatube-cache', 'prefix')
+        self.assertEqual(
+            config['default']['BACKEND'],
+            'django.core.cache.backends.filebased.FileBasedCache'
+        )
+        self.assertEqual(config['default']['KEY_PREFIX'], 'prefix')
+
+    def test_unknown_backend(self):
+        for backend, location in (('nosuch', ''), ('file', '')):
+            with self.subTest(backend=backend):
+                with self.assertRaises(ImproperlyConfigured):
+                    cache_config(backend, location)
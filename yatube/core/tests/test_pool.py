@@ -0,0 +1,36 @@
+import sqlite3
+
+from django.test import SimpleTestCase
+
+from core.pool import ConnectionPool, PoolTimeout
+from yatube.databases import database_config
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    @staticmethod
+    def connect():
+        return sqlite3.connect(':memory:', check_same_thread=False)
+
+    def test_released_connection_is_reused(self):
+        pool = ConnectionPool(size=1, timeout=0.01)
+        connection = pool.acquire(self.connect)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(self.connect)
+        pool.release(connection)
+        self.assertIs(pool.acquire(self.connect), connection)
+
+    def test_dead_connection_fails_health_check(self):
+        pool = ConnectionPool(size=1, health_checks=True)
+        connection = pool.acquire(self.connect)
+        pool.release(connection)
+        connection.close()
+        fresh = pool.acquire(self.connect)
+        self.assertIsNot(fresh, connection)
+        fresh.execute('SELECT 1')
+
+    def test_pool_size_switches_engine(self):
+        databases = database_config('db.sqlite3', pool_size=4)
+        self.assertEqual(
+            databases['default']['ENGINE'], 'core.backends.sqlite3'
+        )
+        self.assertEqual(databases['default']['CONN_MAX_AGE'], 0)
@@ -0,0 +1,77 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.benchmark import find_regressions
+from core.profiling import ProfilingMiddleware
+
+
+class ProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_server_timing_and_sampling(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = os.path.join(tmp, 'profiling.jsonl')
+            with self.settings(PROFILING_SAMPLE_RATE=1, PROFILING_LOG=log):
+                response = self.client.get(reverse('posts:main_page'))
+            self.assertIn('queries', response['Server-Timing'])
+            self.assertIn('tpl;dur=', response['Server-Timing'])
+            out = StringIO()
+            call_command('profiling_report', log=log, stdout=out)
+        self.assertIn('posts:main_page', out.getvalue())
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_request_is_not_profiled(self):
+        with mock.patch.object(
+            ProfilingMiddleware, 'check_budget'
+        ) as check_budget:
+            response = self.client.get(reverse('posts:main_page'))
+        check_budget.assert_not_called()
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_server_timing_is_internal_only(self):
+        response = self.client.get(
+            reverse('posts:main_page'), REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertNotIn('Server-Timing', response)
+        with self.settings(DEBUG=True):
+            response = self.client.get(
+                reverse('posts:main_page'), REMOTE_ADDR='10.0.0.1'
+            )
+        self.assertIn('Server-Timing', response)
+
+    @override_settings(
+        PROFILING_SAMPLE_RATE=1, QUERY_BUDGETS={'posts:main_page': 0}
+    )
+    def test_budget_violation_is_logged(self):
+        with self.assertLogs('yatube.profiling', 'WARNING') as logs:
+            self.client.get(reverse('posts:main_page'))
+        self.assertIn('posts:main_page', logs.output[0])
+
+
+class FindRegressionsTest(SimpleTestCase):
+    def test_slower_views_and_extra_queries_are_flagged(self):
+        baseline = {
+            'posts:main_page': {'median': 10.0, 'queries': 3},
+            'posts:profile': {'median': 10.0, 'queries': 6},
+            'posts:search': {'median': 10.0, 'queries': 4},
+        }
+        current = {
+            'posts:main_page': {'median': 11.0, 'queries': 3},
+            'posts:profile': {'median': 13.0, 'queries': 6},
+            'posts:search': {'median': 9.0, 'queries': 5},
+            'posts:comments': {'median': 50.0, 'queries': 9},
+        }
+        regressions = find_regressions(baseline, current, threshold=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('posts:profile', regressions[0])
+        self.assertIn('posts:search', regressions[1])
@@ -0,0 +1,63 @@
+import threading
+from unittest import mock
+
+from django.db import connection, connections
+from django.test import SimpleTestCase, override_settings
+
+from core.reads import run_parallel, stop_readers
+from core.replicas import _reading_replica
+
+
+class ParallelReadsTest(SimpleTestCase):
+    # Потоки пула открывают свои соединения с тестовой базой.
+    databases = {'default'}
+
+    def setUp(self):
+        self.addCleanup(stop_readers)
+
+    @staticmethod
+    def read():
+        return threading.current_thread().name, _reading_replica.get()
+
+    @override_settings(PARALLEL_READ_WORKERS=2)
+    def test_reads_run_in_pool_with_request_context(self):
+        token = _reading_replica.set(True)
+        try:
+            results = run_parallel(self.read, self.read, self.read)
+        finally:
+            _reading_replica.reset(token)
+        threads = {name for name, _ in results}
+        self.assertIn(threading.current_thread().name, threads)
+        self.assertGreater(len(threads), 1)
+        self.assertTrue(all(replica for _, replica in results))
+
+    @staticmethod
+    def open_connection():
+        connection.ensure_connection()
+
+    def closes_in_reader(self, max_age):
+        """Сколько раз поток пула закрыл соединение за две задачи."""
+        settings_dict = connections.databases['default']
+        self.addCleanup(
+            settings_dict.__setitem__, 'CONN_MAX_AGE',
+            settings_dict['CONN_MAX_AGE']
+        )
+        settings_dict['CONN_MAX_AGE'] = max_age
+        # Соединение с тестовой базой в памяти не закрывается по-настоящему.
+        with mock.patch.object(type(connections['default']), 'close') as close:
+            for _ in range(2):
+                run_parallel(lambda: None, self.open_connection)
+        return close.call_count
+
+    @override_settings(PARALLEL_READ_WORKERS=1)
+    def test_persistent_connection_is_kept(self):
+        self.assertEqual(self.closes_in_reader(None), 0)
+
+    @override_settings(PARALLEL_READ_WORKERS=1)
+    def test_expired_connection_is_released(self):
+        self.assertEqual(self.closes_in_reader(0), 2)
+
+    @override_settings(PARALLEL_READ_WORKERS=0)
+    def test_disabled_pool_runs_inline(self):
+        names = {name for name, _ in run_parallel(self.read, self.read)}
+        self.assertEqual(names, {threading.current_thread().name})
@@ -0,0 +1,45 @@
+from django.db import DEFAULT_DB_ALIAS, router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.replicas import PIN_COOKIE, use_replica
+from posts.models import Post, User
+from yatube.databases import database_config, replica_aliases
+
+
+class ReplicaRouterTest(TestCase):
+    @staticmethod
+    @use_replica
+    def read_view(request):
+        return HttpResponse(router.db_for_read(Post))
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'])
+    def test_reads_go_to_replica_only_inside_marked_views(self):
+        request = RequestFactory().get('/')
+        self.assertEqual(self.read_view(request).content, b'replica_0')
+        self.assertEqual(router.db_for_read(Post), DEFAULT_DB_ALIAS)
+        self.assertEqual(router.db_for_write(Post), DEFAULT_DB_ALIAS)
+
+    def test_own_write_pins_reads_to_primary(self):
+        user = User.objects.create_user(username='writer')
+        self.client.force_login(user)
+        post = Post.objects.create(text='Пост', author=user)
+        response = self.client.get(reverse('posts:main_page'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        response = self.client.post(
+            reverse('posts:add_comment', args=[post.pk]), {'text': 'Hi'}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        with override_settings(DATABASE_REPLICAS=['replica_0']):
+            response = self.read_view(request)
+        self.assertEqual(response.content.decode(), DEFAULT_DB_ALIAS)
+
+    def test_replicas_mirror_default_in_tests(self):
+        databases = database_config('primary.sqlite3', ['replica.sqlite3'])
+        self.assertEqual(replica_aliases(databases), ['replica_0'])
+        self.assertEqual(
+            databases['replica_0']['TEST'], {'MIRROR': 'default'}
+        )
@@ -0,0 +1,94 @@
+import gzip
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.static import CompressedManifestStorage, FileServer
+
+
+class StaticFilesTest(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.TemporaryDirectory()
+        self.root = tempfile.TemporaryDirectory()
+        self.media = tempfile.TemporaryDirectory()
+        for directory in (self.source, self.root, self.media):
+            self.addCleanup(directory.cleanup)
+        os.makedirs(os.path.join(self.source.name, 'css'))
+        with open(os.path.join(self.source.name, 'css', 'site.css'),
+                  'w') as css:
+            css.write('body { color: black; }\n' * 200)
+        settings = override_settings(
+            STATICFILES_DIRS=[self.source.name],
+            STATIC_ROOT=self.root.name,
+            MEDIA_ROOT=self.media.name,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.server = FileServer(self.application)
+
+    @staticmethod
+    def application(environ, start_response):
+        start_response('404 Not Found', [])
+        return [b'django']
+
+    def get(self, path, **headers):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, **headers}
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        response['body'] = b''.join(self.server(environ, start_response))
+        return response
+
+    def test_hashed_asset_is_precompressed_and_immutable(self):
+        hashed = CompressedManifestStorage().stored_name('css/site.css')
+        self.assertNotEqual(hashed, 'css/site.css')
+        response = self.get(
+            f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['status'], '200 OK')
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['headers']['Cache-Control'])
+        self.assertEqual(response['headers']['Vary'], 'Accept-Encoding')
+        self.assertTrue(
+            gzip.decompress(response['body']).startswith(b'body {')
+        )
+        response = self.get(
+            f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=response['headers']['ETag']
+        )
+        self.assertEqual(response['status'], '304 Not Modified')
+        response = self.get('/static/css/site.css')
+        self.assertNotIn('immutable', response['headers']['Cache-Control'])
+        self.assertNotIn('Content-Encoding', response['headers'])
+
+    def test_range_request(self):
+        response = self.get('/static/css/site.css', HTTP_RANGE='bytes=5-9')
+        self.assertEqual(response['status'], '206 Partial Content')
+        self.assertEqual(response['body'], b'{ col')
+        self.assertEqual(
+            response['headers']['Content-Range'], 'bytes 5-9/4600'
+        )
+        response = self.get('/static/css/site.css', HTTP_RANGE='bytes=9999-')
+        self.assertEqual(response['status'], '416 Range Not Satisfiable')
+
+    def test_media_is_handed_to_web_server(self):
+        name = 'posts/ab/cd/' + 'ab' * 32 + '.jpg'
+        os.makedirs(os.path.join(self.media.name, 'posts', 'ab', 'cd'))
+        with open(os.path.join(self.media.name, name), 'wb') as image:
+            image.write(b'jpeg')
+        with override_settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response = self.get(f'/media/{name}')
+        self.assertEqual(
+            response['headers']['X-Accel-Redirect'], f'/internal-media/{name}'
+        )
+        self.assertIn('immutable', response['headers']['Cache-Control'])
+        self.assertEqual(response['body'], b'')
+        self.assertEqual(self.get(f'/media/{name}')['body'], b'jpeg')
+        self.assertEqual(self.get('/media/../secret')['body'], b'django')
+        self.assertEqual(self.get('/static/missing.css')['body'], b'django')
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import threading
+
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, override_settings
+
+from core.writes import run_write, stop_writer
+from yatube.databases import SQLITE_PRAGMAS, database_config
+
+
+class SQLiteTuningTest(SimpleTestCase):
+    def test_pragmas_applied_to_new_connections(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            databases = database_config(
+                os.path.join(tmp, 'tuned.sqlite3'), tuned=True
+            )
+            connection = ConnectionHandler(databases)['default']
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA synchronous')
+                    # 1 соответствует NORMAL.
+                    self.assertEqual(cursor.fetchone()[0], 1)
+            finally:
+                connection.close()
+        self.assertEqual(databases['default']['PRAGMAS'], SQLITE_PRAGMAS)
+
+    @override_settings(SQLITE_WRITE_QUEUE=True)
+    def test_write_queue_runs_in_single_writer(self):
+        self.addCleanup(stop_writer)
+        names = {
+            run_write(lambda: threading.current_thread().name)
+            for _ in range(3)
+        }
+        self.assertEqual(len(names), 1)
+        self.assertNotEqual(names.pop(), threading.current_thread().name)
+        with self.assertRaises(ZeroDivisionError):
+            run_write(lambda: 1 / 0)
@@ -0,0 +1,64 @@
+"""Очередь записи в SQLite внутри процесса.
+
+SQLite допускает одного писателя. Когда несколько потоков одновременно
+открывают транзакции записи, часть из них получает «database is locked».
+С включённой очередью все записи выполняет один поток-писатель по
+порядку поступления, а читатели в режиме WAL его не ждут.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from core.replicas import mark_written
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _writer():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='sqlite-writer'
+            )
+        return _executor
+
+
+def _in_transaction(func, args, kwargs):
+    try:
+        with transaction.atomic():
+            return func(*args, **kwargs)
+    except Exception:
+        # Поток-писатель живёт долго: сломанное соединение не храним.
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
+        raise
+
+
+def run_write(func, *args, **kwargs):
+    """Выполняет запись через очередь, если она включена, и ждёт результат.
+
+    Внутри уже открытой транзакции запись выполняется на месте: поток-
+    писатель не увидел бы её незафиксированных данных и ждал бы её блокировок.
+    Исключение из func поднимается в вызывающем потоке.
+    """
+    if not settings.SQLITE_WRITE_QUEUE or connection.in_atomic_block:
+        return func(*args, **kwargs)
+    result = _writer().submit(_in_transaction, func, args, kwargs).result()
+    # Запись прошла в потоке-писателе: прижимаем чтение к основной базе.
+    mark_written()
+    return result
+
+
+def stop_writer():
+    """Закрывает соединение потока-писателя и останавливает его."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            return
+        _executor.submit(lambda: connection.close()).result()
+        _executor.shutdown()
+        _executor = None
@@ -0,0 +1,239 @@
+import hashlib
+import math
+import random
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.http import http_date, quote_etag
+
+from core.profiling import record_cache
+
+from . import thumbnails
+from .models import ScopeVersion
+
+# Пространства имён ключей: версии областей и страницы каждого
+# представления хранятся отдельно, общий префикс задаёт KEY_PREFIX.
+VERSION_KEY = 'feed_version:{}'
+PAGE_KEY = 'feed_page:{}:{}'
+LATEST_KEY = 'feed_page_latest:{}:{}'
+CACHE_HEADER = 'X-Feed-Cache'
+
+
+def _digest(*parts):
+    return hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def feed_timeout():
+    """Срок хранения лент.
+
+    Инвалидация доходит только до кэша процесса, который записал пост:
+    с locmem у остальных процессов лента живёт до срока, поэтому он
+    короткий.
+    """
+    if isinstance(caches['default'], LocMemCache):
+        return min(
+            settings.FEED_CACHE_TIMEOUT, settings.FEED_CACHE_LOCAL_TIMEOUT
+        )
+    return settings.FEED_CACHE_TIMEOUT
+
+
+def _version_key(scope):
+    # В имени области бывает имя пользователя: пробелы и не-ASCII
+    # недопустимы в ключах memcached.
+    return VERSION_KEY.format(_digest(scope))
+
+
+def scope_versions(scopes):
+    """Текущие версии областей кэша; пропавшая версия заводится заново."""
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Версия живёт дольше страниц, которые на неё ссылаются.
+            cache.add(key, _new_version(), feed_timeout() * 2)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*scopes):
+    """Сбрасывает кэш лент: у областей появляются новые версии.
+
+    Версии в кэше меняют ключи страниц, счётчики ScopeVersion в базе —
+    ETag и Last-Modified.
+    """
+    cache.set_many(
+        {_version_key(scope): _new_version() for scope in scopes},
+        feed_timeout() * 2
+    )
+    now = timezone.now()
+    ScopeVersion.objects.filter(scope__in=scopes).update(
+        version=F('version') + 1, modified=now
+    )
+    # Области, которые ещё не менялись, заводятся с первой версией.
+    ScopeVersion.objects.bulk_create(
+        [ScopeVersion(scope=scope, modified=now) for scope in scopes],
+        ignore_conflicts=True,
+    )
+
+
+def scope_state(request, scopes):
+    """Отпечаток счётчиков областей и время их последней смены.
+
+    Счётчики лежат в базе, поэтому одинаковы во всех процессах и не
+    истекают, как версии в кэше. Читаются одним запросом по уникальному
+    индексу и запоминаются на запросе: их делят условный GET и кэш.
+    """
+    states = getattr(request, '_feed_states', None)
+    if states is None:
+        states = request._feed_states = {}
+    key = tuple(scopes)
+    if key not in states:
+        rows = dict.fromkeys(scopes)
+        rows.update(
+            (scope, (version, modified))
+            for scope, version, modified in ScopeVersion.objects.filter(
+                scope__in=scopes
+            ).values_list('scope', 'version', 'modified')
+        )
+        times = [row[1] for row in rows.values() if row is not None]
+        states[key] = (
+            _digest(*rows.items()),
+            # Округление вверх: смена в ту же секунду, что и
+            # If-Modified-Since клиента, не должна давать 304.
+            math.ceil(max(times).timestamp()) if times else None,
+        )
+    return states[key]
+
+
+def _needs_refresh(entry):
+    """Вероятностное раннее обновление: чем ближе срок, тем вероятнее."""
+    jitter = -entry['delta'] * settings.FEED_CACHE_BETA * math.log(
+        1.0 - random.random()
+    )
+    return time.time() + jitter >= entry['expires']
+
+
+def _from_entry(entry, state):
+    record_cache(hits=1)
+    response = HttpResponse(
+        entry['content'],
+        content_type=entry['content_type'],
+        status=entry['status'],
+    )
+    response[CACHE_HEADER] = state
+    return response
+
+
+def cache_feed(get_scopes):
+    """Кэширует страницу ленты до изменения её областей.
+
+    get_scopes получает аргументы представления и возвращает области,
+    при инвалидации которых страницу нужно построить заново. Построением
+    занимается один процесс, остальные в это время отдают прошлую версию.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            scopes = get_scopes(*args, **kwargs)
+            identity = _digest(request.get_full_path(), request.user.pk)
+            # Страница не переживает счётчики, по которым conditional_feed
+            # выдал ETag, даже если версия в кэше процесса ещё старая.
+            key = PAGE_KEY.format(
+                view_func.__name__,
+                _digest(
+                    identity, *scopes, *scope_versions(scopes),
+                    scope_state(request, scopes)[0]
+                )
+            )
+            latest_key = LATEST_KEY.format(view_func.__name__, identity)
+            entry = cache.get(key)
+            if entry is not None and not _needs_refresh(entry):
+                return _from_entry(entry, 'HIT')
+            lock_key = f'{key}:lock'
+            locked = cache.add(
+                lock_key, 1, settings.FEED_CACHE_LOCK_TIMEOUT
+            )
+            if not locked:
+                stale = entry or cache.get(latest_key)
+                if stale is not None:
+                    return _from_entry(stale, 'STALE')
+            try:
+                started = time.time()
+                thumbnails.reset_deferred()
+                response = view_func(request, *args, **kwargs)
+                # Страницу с заглушками вместо миниатюр не кэшируем.
+                if (response.status_code == 200 and not response.cookies
+                        and not thumbnails.was_deferred()):
+                    finished = time.time()
+                    timeout = feed_timeout()
+                    entry = {
+                        'content': response.content,
+                        'content_type': response['Content-Type'],
+                        'status': response.status_code,
+                        'delta': finished - started,
+                        'expires': finished + timeout,
+                    }
+                    # Запас по сроку хранения, чтобы было что отдать,
+                    # пока страница перестраивается.
+                    cache.set_many(
+                        {key: entry, latest_key: entry}, timeout * 2
+                    )
+            finally:
+                # Чужую блокировку не снимаем: строит другой процесс.
+                if locked:
+                    cache.delete(lock_key)
+            record_cache(misses=1)
+            response[CACHE_HEADER] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_feed(get_scopes):
+    """Отвечает 304 на If-None-Match и If-Modified-Since.
+
+    Валидаторы строятся по scope_state: ETag — отпечаток счётчиков
+    областей, адреса и пользователя, Last-Modified — время последней
+    смены счётчика. Для ответа 304 не нужны ни выборка постов, ни рендер
+    шаблона.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            state, last_modified = scope_state(
+                request, get_scopes(*args, **kwargs)
+            )
+            etag = quote_etag(_digest(
+                request.get_full_path(), request.user.pk, state
+            ))
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                return response
+            thumbnails.reset_deferred()
+            response = view_func(request, *args, **kwargs)
+            # Заглушка миниатюры сменится картинкой без смены счётчиков.
+            if response.status_code == 200 and not thumbnails.was_deferred():
+                response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+            return response
+        return wrapper
+    return decorator
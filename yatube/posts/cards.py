@@ -0,0 +1,41 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from core.profiling import record_cache
+
+from .thumbnails import thumbnails_ready
+
+CARD_TEMPLATE = 'includes/post.html'
+
+
+def card_key(post):
+    """Ключ карточки: версия поста и отпечаток имени автора.
+
+    Правки поста меняют его версию, имя автора хранится отдельно.
+    """
+    stamp = hashlib.md5(post.author.get_full_name().encode()).hexdigest()
+    return f'post_card:{post.pk}:{post.version}:{stamp}'
+
+
+def render_cards(posts):
+    """Возвращает пары (пост, html карточки), рендеря только промахи кэша."""
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cached = cache.get_many(keys)
+    record_cache(hits=len(cached), misses=len(keys) - len(cached))
+    missing, complete = {}, {}
+    template = get_template(CARD_TEMPLATE)
+    for post, key in zip(posts, keys):
+        if key not in cached:
+            missing[key] = template.render({'post': post})
+            # Карточку с заглушкой вместо миниатюры не кэшируем.
+            if thumbnails_ready(post.image):
+                complete[key] = missing[key]
+    if complete:
+        cache.set_many(complete, settings.POST_CARD_CACHE_TIMEOUT)
+    cached.update(missing)
+    return [(post, mark_safe(cached[key])) for post, key in zip(posts, keys)]
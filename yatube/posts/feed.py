@@ -0,0 +1,172 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F, Q
+
+from core.writes import run_write
+
+from .models import FeedItem, Follow, Post, User, UserStats
+
+logger = logging.getLogger(__name__)
+
+# Аннотация с датой, по которой сортируется лента подписок.
+FEED_CREATED = 'feed_created'
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+
+
+def is_celebrity(author):
+    """Посты авторов с огромной аудиторией не раскладываются по лентам."""
+    return UserStats.objects.filter(
+        user=author, followers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).exists()
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author=post.author_id
+    ).values_list('user_id', flat=True)
+    FeedItem.objects.bulk_create(
+        (FeedItem(user_id=user_id, post=post, created=post.created)
+         for user_id in followers.iterator()),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(follow):
+    """Добавляет в ленту подписчика последние посты нового автора."""
+    if is_celebrity(follow.author_id):
+        return
+    posts = Post.objects.filter(author=follow.author_id).values_list(
+        'pk', 'created'
+    )[:settings.FEED_BACKFILL_LIMIT]
+    FeedItem.objects.bulk_create(
+        (FeedItem(user_id=follow.user_id, post_id=pk, created=created)
+         for pk, created in posts),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune(follow):
+    """Убирает из ленты посты автора, от которого отписались."""
+    FeedItem.objects.filter(
+        user=follow.user_id, post__author=follow.author_id
+    ).delete()
+
+
+def rebuild(author_id=None):
+    """Добавляет в ленты все недостающие записи одним запросом.
+
+    То же, что backfill для каждой подписки, но без цикла по подпискам:
+    нужно после массового импорта, который обходит сигналы. С author_id
+    раскладываются только посты этого автора.
+    """
+    author_filter, params = '', []
+    if author_id is not None:
+        author_filter, params = 'WHERE author_id = %s ', [author_id]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {FeedItem._meta.db_table} '
+            f'(user_id, post_id, created) '
+            f'SELECT f.user_id, p.id, p.created '
+            f'FROM {Follow._meta.db_table} f '
+            f'JOIN (SELECT id, author_id, created, ROW_NUMBER() OVER ('
+            f'PARTITION BY author_id ORDER BY created DESC) AS position '
+            f'FROM {Post._meta.db_table} {author_filter}) p '
+            f'ON p.author_id = f.author_id AND p.position <= %s '
+            f'LEFT JOIN {UserStats._meta.db_table} s '
+            f'ON s.user_id = f.author_id '
+            f'WHERE COALESCE(s.followers_count, 0) <= %s '
+            f'ON CONFLICT DO NOTHING',
+            [*params, settings.FEED_BACKFILL_LIMIT, settings.FEED_FANOUT_LIMIT]
+        )
+
+
+def catch_up(author_id):
+    """Раскладывает посты автора, который перестал быть знаменитостью.
+
+    Пока он был знаменитостью, его посты читались при открытии ленты и
+    не раскладывались; теперь лента их так не читает. Знаменитость,
+    успевшую вернуть подписчиков, rebuild пропускает сам.
+    """
+    run_write(rebuild, author_id)
+
+
+def _catch_up_in_background(author_id):
+    # Снимаем отметку до работы: переход порога во время rebuild
+    # поставит ещё один проход, а не потеряется.
+    with _executor_lock:
+        _pending.discard(author_id)
+    try:
+        catch_up(author_id)
+    except Exception:
+        logger.exception('Не удалось разложить посты автора %s', author_id)
+    finally:
+        # Поток пула живёт долго: соединения не держим между задачами.
+        connections.close_all()
+
+
+def schedule_catch_up(author_id):
+    """Ставит catch_up в фоновый пул, если отписка опустила автора до предела.
+
+    Вызывается после отписки: порог пересекается, когда подписчиков ровно
+    предел. Полный rebuild не выполняется в запросе, а повторные переходы
+    порога, пока проход ждёт очереди, сливаются в один.
+    """
+    if UserStats.objects.filter(
+        user=author_id, followers_count=settings.FEED_FANOUT_LIMIT
+    ).exists():
+        transaction.on_commit(lambda: _submit(author_id))
+
+
+def _submit(author_id):
+    global _executor
+    with _executor_lock:
+        if author_id in _pending:
+            return
+        _pending.add(author_id)
+        if _executor is None:
+            # Один поток: rebuild — тяжёлая запись, параллельно их не гоняем.
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='feed'
+            )
+    _executor.submit(_catch_up_in_background, author_id)
+
+
+def stop_feed_workers():
+    """Дожидается задач пула и останавливает его; следующая создаст новый."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+def feed_posts(user):
+    """Лента подписок: материализованная часть плюс чтение знаменитостей.
+
+    Посты аннотированы FEED_CREATED: без знаменитостей это копия даты
+    в FeedItem, и страница читается по индексу (user, -created) ленты.
+    """
+    celebrities = User.objects.filter(
+        following__user=user,
+        stats__followers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).values_list('pk', flat=True)
+    celebrities = list(celebrities)
+    if not celebrities:
+        return Post.objects.filter(feed_items__user=user).annotate(
+            **{FEED_CREATED: F('feed_items__created')}
+        )
+    return Post.objects.filter(
+        Q(feed_items__user=user) | Q(author__in=celebrities)
+    ).distinct().annotate(**{FEED_CREATED: F('created')})
@@ -0,0 +1,219 @@
+"""Нормализация картинок постов после загрузки.
+
+Загрузка пишется во временный файл кусками (FILE_UPLOAD_HANDLERS) и
+сохраняется как есть, а после коммита пул IMAGE_WORKERS вне потоков
+запросов декодирует оригинал: поворачивает по EXIF, убирает метаданные,
+уменьшает до POST_IMAGE_MAX_SIZE, перекодирует в POST_IMAGE_FORMAT и
+кладёт рядом копии ширин POST_IMAGE_WIDTHS для srcset. Пост
+переключается на новый файл, оригинал удаляется, миниатюры sorl дальше
+строятся из маленького файла.
+
+Что картинка нормализована, помнит флаг Post.image_normalized, а не
+её имя: загрузка может называться как угодно. Ширина нормализованной
+картинки входит в имя производного файла (posts.storage):
+posts/3f/a2/<хеш>.1280w.jpg, копии — posts/3f/a2/<хеш>.480w.jpg. По
+имени srcset собирается без обращений к хранилищу.
+"""
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from core.writes import run_write
+
+from .models import Post
+from .storage import post_image_storage as storage
+from .thumbnails import schedule_thumbnails
+
+logger = logging.getLogger(__name__)
+
+NAME_RE = re.compile(r'^(?P<stem>.+)\.(?P<width>\d+)w\.(?P<ext>\w+)$')
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = set()
+
+
+class Report:
+    """Во что обошлась картинка до и после нормализации."""
+
+    def __init__(self, name, original_bytes, original_decode_ms, size,
+                 decode_ms):
+        self.name = name
+        self.original_bytes = original_bytes
+        self.original_decode_ms = original_decode_ms
+        self.bytes = size
+        self.decode_ms = decode_ms
+
+    @property
+    def bytes_saved(self):
+        return self.original_bytes - self.bytes
+
+    @property
+    def decode_ms_saved(self):
+        return self.original_decode_ms - self.decode_ms
+
+    def __str__(self):
+        return (
+            f'{self.name}: {self.original_bytes} → {self.bytes} байт '
+            f'(−{self.bytes_saved}), декодирование '
+            f'{self.original_decode_ms:.1f} → {self.decode_ms:.1f} мс '
+            f'(−{self.decode_ms_saved:.1f})'
+        )
+
+
+def srcset(name):
+    """Значение srcset для нормализованной картинки, иначе пустая строка."""
+    match = NAME_RE.match(name or '')
+    if match is None:
+        return ''
+    width = int(match['width'])
+    names = [
+        (f'{match["stem"]}.{variant}w.{match["ext"]}', variant)
+        for variant in sorted(settings.POST_IMAGE_WIDTHS) if variant < width
+    ]
+    names.append((name, width))
+    return ', '.join(
+        f'{storage.url(variant)} {size}w' for variant, size in names
+    )
+
+
+def _decode(source):
+    start = time.perf_counter()
+    image = Image.open(source)
+    image.load()
+    return image, (time.perf_counter() - start) * 1000
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def _encode(image, image_format):
+    options = {'optimize': True}
+    if image_format in ('JPEG', 'WEBP'):
+        options['quality'] = settings.POST_IMAGE_QUALITY
+    if image_format == 'JPEG':
+        options['progressive'] = True
+    buffer = BytesIO()
+    # Метаданные (EXIF, ICC, текстовые блоки) не передаются в save.
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def encode_image(name):
+    """Сохраняет нормализованную картинку и копии; возвращает отчёт.
+
+    Оригинал не трогает. Анимацию не перекодирует и возвращает None.
+    Тот же оригинал даёт те же имена, и готовые файлы не пишутся заново.
+    Работает только с хранилищем, поэтому годится и для процессов.
+    """
+    with storage.open(name) as source:
+        original_bytes = source.size
+        image, original_decode_ms = _decode(source)
+    if getattr(image, 'is_animated', False):
+        return None
+    image = ImageOps.exif_transpose(image)
+    image_format = settings.POST_IMAGE_FORMAT
+    if _has_alpha(image):
+        # JPEG не хранит прозрачность.
+        if image_format == 'JPEG':
+            image_format = 'PNG'
+        image = image.convert('RGBA')
+    elif image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    size = settings.POST_IMAGE_MAX_SIZE
+    image.thumbnail((size, size), Image.LANCZOS)
+    image.info = {}
+    ext = EXTENSIONS[image_format]
+    content = _encode(image, image_format)
+    new_name = storage.save_derived(
+        name, f'{image.width}w.{ext}', ContentFile(content)
+    )
+    for width in settings.POST_IMAGE_WIDTHS:
+        if width >= image.width:
+            continue
+        variant = image.copy()
+        variant.thumbnail((width, image.height), Image.LANCZOS)
+        storage.save_derived(
+            name, f'{width}w.{ext}',
+            ContentFile(_encode(variant, image_format))
+        )
+    return Report(
+        new_name, original_bytes, original_decode_ms, len(content),
+        _decode(BytesIO(content))[1]
+    )
+
+
+def switch_image(name, new_name):
+    """Переводит посты с картинки name на нормализованную new_name.
+
+    Сохранение через модель меняет версию поста и сбрасывает ленты,
+    а сигналы снимают ссылки с оригинала: без ссылок он удаляется.
+    """
+    for post in Post.objects.filter(image=name):
+        post.image.name = new_name
+        post.image_normalized = True
+        run_write(post.save, update_fields=['image', 'image_normalized'])
+
+
+def normalize_image(name):
+    """Нормализует картинку и переключает на неё посты."""
+    report = encode_image(name)
+    if report is None:
+        schedule_thumbnails(name)
+    else:
+        switch_image(name, report.name)
+        logger.info('%s', report)
+    return report
+
+
+def _normalize_in_background(name):
+    try:
+        normalize_image(name)
+    except Exception:
+        logger.exception('Не удалось нормализовать картинку %s', name)
+    finally:
+        # Поток пула живёт долго: соединения не держим между задачами.
+        connections.close_all()
+        with _executor_lock:
+            _in_flight.discard(name)
+
+
+def schedule_normalize(name):
+    """Ставит нормализацию картинки в фоновый пул после коммита."""
+    if name:
+        transaction.on_commit(lambda: _submit(name))
+
+
+def _submit(name):
+    global _executor
+    with _executor_lock:
+        if name in _in_flight:
+            return
+        _in_flight.add(name)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                thread_name_prefix='images',
+            )
+    _executor.submit(_normalize_in_background, name)
+
+
+def stop_normalizers():
+    """Дожидается задач пула и останавливает его; следующая создаст новый."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
@@ -0,0 +1,139 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.benchmark import benchmark_database, summarize
+from posts.caching import CACHE_HEADER
+from posts.models import Group, Post
+from yatube.caches import BACKENDS, cache_config
+
+User = get_user_model()
+SERVED_FROM_CACHE = ('HIT', 'STALE')
+
+
+def run_worker(task):
+    """Один процесс-воркер: читает ленты и изредка публикует посты."""
+    caches, urls, requests, write_ratio, seed, author_id = task
+    rng = random.Random(seed)
+    states, timings = Counter(), []
+    with override_settings(CACHES=caches):
+        # Адрес вне INTERNAL_IPS, чтобы не включался debug_toolbar.
+        client = Client(REMOTE_ADDR='10.0.0.1')
+        for number in range(requests):
+            if rng.random() < write_ratio:
+                Post.objects.create(
+                    text=f'Пост воркера {seed}-{number}', author_id=author_id
+                )
+                continue
+            # Популярные страницы запрашивают чаще: распределение Парето.
+            index = min(int(rng.paretovariate(1.2)) - 1, len(urls) - 1)
+            start = time.perf_counter()
+            response = client.get(urls[index])
+            timings.append((time.perf_counter() - start) * 1000)
+            states[response.get(CACHE_HEADER, 'NONE')] += 1
+    connections.close_all()
+    return states, timings
+
+
+class Command(BaseCommand):
+    help = (
+        'Гоняет несколько процессов по лентам и сравнивает бэкенды кэша '
+        'по доле попаданий и p99'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backends', nargs='+', choices=BACKENDS,
+            default=['locmem', 'file']
+        )
+        parser.add_argument(
+            '--location', default='',
+            help='Адрес сервера для memcached, pylibmc и redis'
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument('--posts', type=int, default=300)
+        parser.add_argument('--groups', type=int, default=5)
+        parser.add_argument('--write-ratio', type=float, default=0.01)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            database = os.path.join(tmp, 'bench.sqlite3')
+            with benchmark_database(name=database):
+                author, urls = self.seed(options)
+                self.stdout.write(
+                    f'{"backend":>10} {"hit ratio":>10} '
+                    f'{"median, ms":>11} {"p99, ms":>9}'
+                )
+                for backend in options['backends']:
+                    location = options['location']
+                    if backend == 'file':
+                        location = os.path.join(tmp, 'cache')
+                    caches = cache_config(backend, location, 'bench')
+                    with override_settings(CACHES=caches):
+                        cache.clear()
+                    self.report(backend, self.run(
+                        caches, urls, author.pk, options
+                    ))
+
+    @staticmethod
+    def seed(options):
+        author = User.objects.create(username='bench_author')
+        groups = [
+            Group.objects.create(
+                title=f'Группа {number}', slug=f'group-{number}',
+                description='-'
+            )
+            for number in range(options['groups'])
+        ]
+        Post.objects.bulk_create(
+            Post(
+                text=f'Пост {number}', author=author,
+                group=groups[number % len(groups)]
+            )
+            for number in range(options['posts'])
+        )
+        urls = [reverse('posts:main_page')]
+        urls += [f'{urls[0]}?page={number}' for number in range(2, 6)]
+        urls += [
+            reverse('posts:group_list', args=[group.slug])
+            for group in groups
+        ]
+        urls.append(reverse('posts:profile', args=[author.username]))
+        return author, urls
+
+    @staticmethod
+    def run(caches, urls, author_id, options):
+        tasks = [
+            (caches, urls, options['requests'], options['write_ratio'],
+             seed, author_id)
+            for seed in range(options['workers'])
+        ]
+        # Соединения не должны переходить в дочерние процессы.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(options['workers']) as pool:
+            return pool.map(run_worker, tasks)
+
+    def report(self, backend, results):
+        states, timings = Counter(), []
+        for worker_states, worker_timings in results:
+            states.update(worker_states)
+            timings.extend(worker_timings)
+        total = sum(states.values())
+        hits = sum(states[state] for state in SERVED_FROM_CACHE)
+        stats = summarize(timings)
+        self.stdout.write(
+            f'{backend:>10} {hits / total:>10.1%} '
+            f'{stats["median"]:>11.2f} {stats["p99"]:>9.2f}'
+        )
@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.urls import reverse
+
+from core.benchmark import benchmark_database, serve_load, summarize
+from core.pool import get_pool
+from posts.models import Comment, Post
+
+User = get_user_model()
+MODES = {
+    'close': {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 0},
+    'persistent': {
+        'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': None
+    },
+    'pool': {'ENGINE': 'core.backends.sqlite3', 'CONN_MAX_AGE': 0},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест короткой страницы: запросы в секунду '
+        'без постоянных соединений, с ними и с пулом'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modes', nargs='+', choices=MODES, default=list(MODES)
+        )
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=8)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            database = os.path.join(tmp, 'bench.sqlite3')
+            with benchmark_database(name=database):
+                url = self.seed()
+                self.stdout.write(
+                    f'{"mode":>10} {"rps":>8} '
+                    f'{"median, ms":>11} {"p99, ms":>9}'
+                )
+                for mode in options['modes']:
+                    self.use_mode(mode, options['concurrency'])
+                    rps, timings = serve_load(
+                        [url], options['requests'], options['concurrency']
+                    )
+                    stats = summarize(timings)
+                    self.stdout.write(
+                        f'{mode:>10} {rps:>8.0f} '
+                        f'{stats["median"]:>11.2f} {stats["p99"]:>9.2f}'
+                    )
+                self.use_mode('close', options['concurrency'])
+
+    @staticmethod
+    def seed():
+        author = User.objects.create(username='bench_author')
+        post = Post.objects.create(text='Пост', author=author)
+        Comment.objects.bulk_create(
+            Comment(post=post, author=author, text=f'Коммент {number}')
+            for number in range(5)
+        )
+        return reverse('posts:comments', args=[post.pk])
+
+    @staticmethod
+    def use_mode(mode, pool_size):
+        """Переключает настройки default; потоки подхватят их заново."""
+        connections.close_all()
+        get_pool('default', connections.databases['default']).close_idle()
+        settings_dict = connections.databases['default']
+        settings_dict.update(MODES[mode], POOL={'SIZE': pool_size})
+        # Обёртка главного потока могла остаться со старым ENGINE.
+        try:
+            del connections['default']
+        except AttributeError:
+            pass
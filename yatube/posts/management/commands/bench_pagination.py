@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+
+from core.benchmark import benchmark_database, measure
+from posts.models import Post
+from posts.utils import CursorPaginator
+
+User = get_user_model()
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает OFFSET и курсорную пагинацию на глубоких страницах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--per-page', type=int, default=10)
+        parser.add_argument(
+            '--pages', type=int, nargs='+', default=[1, 10, 100, 1000]
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        per_page = options['per_page']
+        with benchmark_database():
+            author = User.objects.create(username='bench_author')
+            for start in range(0, options['posts'], BATCH_SIZE):
+                count = min(BATCH_SIZE, options['posts'] - start)
+                Post.objects.bulk_create(
+                    Post(text=f'Пост {start + i}', author=author)
+                    for i in range(count)
+                )
+            queryset = Post.objects.all()
+            cursors = self.collect_cursors(
+                queryset, per_page, max(options['pages'])
+            )
+            self.stdout.write(
+                f'{"page":>6} {"offset, ms":>12} {"cursor, ms":>12}'
+            )
+            for number in options['pages']:
+                if number not in cursors:
+                    continue
+
+                def offset_page():
+                    paginator = Paginator(queryset, per_page)
+                    list(paginator.page(number))
+
+                def cursor_page():
+                    paginator = CursorPaginator(queryset, per_page)
+                    list(paginator.cursor_page(cursors[number])[0])
+
+                offset = measure(offset_page, options['repeat'])
+                cursor = measure(cursor_page, options['repeat'])
+                self.stdout.write(
+                    f'{number:>6} {offset["median"]:>12.2f} '
+                    f'{cursor["median"]:>12.2f}'
+                )
+
+    @staticmethod
+    def collect_cursors(queryset, per_page, last_page):
+        """Проходит ленту курсорами и запоминает токен каждой страницы."""
+        cursors = {1: None}
+        paginator = CursorPaginator(queryset, per_page)
+        token = None
+        for number in range(1, last_page):
+            _, token, _ = paginator.cursor_page(token)
+            if token is None:
+                break
+            cursors[number + 1] = token
+        return cursors
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.urls import reverse
+
+from core.benchmark import benchmark_database, serve_load, summarize
+from core.reads import stop_readers
+from posts.models import Group, Post, User
+from posts.synthetic import Generator
+
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает последовательные и параллельные чтения страниц '
+        'при высокой конкуренции и медленной базе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--latency', type=float, default=5.0,
+            help='Задержка каждого SQL-запроса, мс'
+        )
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на каждый уровень конкуренции'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 8, 32]
+        )
+
+    def handle(self, *args, **options):
+        latency = options['latency'] / 1000
+
+        def slow_database(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            # Сигнал приходит при каждом переподключении, а список обёрток
+            # у соединения остаётся прежним.
+            # В начало списка: execute_wrapper() снимает последнюю.
+            if slow_database not in connection.execute_wrappers:
+                connection.execute_wrappers.insert(0, slow_database)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = os.path.join(tmp, 'bench.sqlite3')
+            with benchmark_database(name=database):
+                Generator(users=200, posts=2000, hot_comments=200).run()
+                urls = self.urls()
+                connections.close_all()
+                connection_created.connect(add_latency)
+                self.stdout.write(
+                    f'{"clients":>8} {"mode":>10} {"rps":>8} '
+                    f'{"median, ms":>11} {"p99, ms":>9}'
+                )
+                try:
+                    for concurrency in options['concurrency']:
+                        for mode, workers in (
+                            ('sequential', 0),
+                            ('parallel', options['workers']),
+                        ):
+                            self.run(
+                                urls, mode, workers, concurrency,
+                                options['requests']
+                            )
+                finally:
+                    connection_created.disconnect(add_latency)
+                    connections.close_all()
+
+    def run(self, urls, mode, workers, concurrency, requests):
+        # Без кэша страниц: замеряются сами чтения.
+        with override_settings(
+            CACHES=DUMMY_CACHES, PARALLEL_READ_WORKERS=workers
+        ):
+            rps, timings = serve_load(urls, requests, concurrency)
+        stop_readers()
+        stats = summarize(timings)
+        self.stdout.write(
+            f'{concurrency:>8} {mode:>10} {rps:>8.0f} '
+            f'{stats["median"]:>11.2f} {stats["p99"]:>9.2f}'
+        )
+
+    @staticmethod
+    def urls():
+        """Профиль, группа и пост с самым большим числом комментариев."""
+        author = User.objects.order_by('-stats__followers_count').first()
+        group = Group.objects.first()
+        post = Post.objects.order_by('-comments_count').first()
+        return [
+            reverse('posts:profile', args=[author.username]),
+            reverse('posts:group_list', args=[group.slug]),
+            reverse('posts:post_detail', args=[post.pk]),
+        ]
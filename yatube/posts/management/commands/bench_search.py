@@ -0,0 +1,75 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.benchmark import benchmark_database, measure
+from posts.models import Group, Post
+from posts.search import IContainsBackend, SQLiteFTSBackend
+
+User = get_user_model()
+BATCH_SIZE = 5000
+COMMON_WORDS = (
+    'пост', 'лента', 'день', 'город', 'книга', 'дорога', 'утро', 'друг',
+)
+RARE_WORD = 'эпистолярный'
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает поиск через icontains и индекс FTS5'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument(
+            '--queries', nargs='+',
+            default=[COMMON_WORDS[0], RARE_WORD, 'город книга']
+        )
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self.seed(options)
+            fts = SQLiteFTSBackend()
+            fts.rebuild()
+            backends = {'icontains': IContainsBackend(), 'fts5': fts}
+            self.stdout.write(
+                f'{"query":>20} {"icontains, ms":>14} {"fts5, ms":>10}'
+            )
+            for query in options['queries']:
+                medians = [
+                    measure(
+                        lambda: backend.search(query, options['limit']),
+                        options['repeat']
+                    )['median']
+                    for backend in backends.values()
+                ]
+                self.stdout.write(
+                    f'{query:>20} {medians[0]:>14.2f} {medians[1]:>10.2f}'
+                )
+
+    @staticmethod
+    def seed(options):
+        rng = random.Random(0)
+        author = User.objects.create(username='bench_author')
+        groups = [
+            Group.objects.create(
+                title=f'Группа {number}', slug=f'group-{number}',
+                description='-'
+            )
+            for number in range(options['groups'])
+        ]
+        for start in range(0, options['posts'], BATCH_SIZE):
+            count = min(BATCH_SIZE, options['posts'] - start)
+            posts = []
+            for number in range(start, start + count):
+                words = rng.choices(COMMON_WORDS, k=12)
+                # Редкое слово встречается примерно в одном посте из 10000.
+                if number % 10000 == 0:
+                    words.append(RARE_WORD)
+                posts.append(Post(
+                    text=' '.join(words), author=author,
+                    group=groups[number % len(groups)]
+                ))
+            Post.objects.bulk_create(posts)
@@ -0,0 +1,139 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+from django.test import override_settings
+
+from core.benchmark import benchmark_database, summarize
+from core.writes import run_write, stop_writer
+from posts.models import Comment, Post
+from yatube.databases import SQLITE_PRAGMAS
+
+User = get_user_model()
+MODES = {
+    'stock': {'pragmas': None, 'queue': False},
+    'tuned': {'pragmas': SQLITE_PRAGMAS, 'queue': False},
+    'queue': {'pragmas': SQLITE_PRAGMAS, 'queue': True},
+}
+
+
+class MixedLoad:
+    """Потоки читателей и писателей, работающие до общего дедлайна."""
+
+    def __init__(self, author, post_ids, queue, seconds):
+        self.author = author
+        self.post_ids = post_ids
+        self.queue = queue
+        self.deadline = time.perf_counter() + seconds
+        self.results = {'read': [], 'write': [], 'locked': 0}
+        self.lock = threading.Lock()
+
+    def write(self, number):
+        # Чтение и запись одной транзакцией, как у представления
+        # вместе с обработчиками сигналов.
+        post = Post.objects.get(pk=self.post_ids[number % len(self.post_ids)])
+        Comment.objects.create(post=post, author=self.author, text='Коммент')
+
+    def attempt(self, kind, number):
+        if kind == 'read':
+            list(Post.objects.for_feed()[:10])
+        elif self.queue:
+            run_write(self.write, number)
+        else:
+            with transaction.atomic():
+                self.write(number)
+
+    def worker(self, kind, number):
+        try:
+            while time.perf_counter() < self.deadline:
+                number += 1
+                start = time.perf_counter()
+                try:
+                    self.attempt(kind, number)
+                except OperationalError:
+                    with self.lock:
+                        self.results['locked'] += 1
+                    continue
+                elapsed = (time.perf_counter() - start) * 1000
+                with self.lock:
+                    self.results[kind].append(elapsed)
+        finally:
+            connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Смешанная нагрузка чтения и записи на SQLite: стандартные '
+        'настройки, профиль PRAGMA и профиль с очередью записи'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modes', nargs='+', choices=MODES, default=list(MODES)
+        )
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--posts', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"mode":>6} {"reads/s":>8} {"writes/s":>9} {"locked":>7} '
+            f'{"read p99, ms":>13} {"write p99, ms":>14}'
+        )
+        for mode in options['modes']:
+            with tempfile.TemporaryDirectory() as tmp:
+                self.report(mode, self.run(
+                    MODES[mode], os.path.join(tmp, 'bench.sqlite3'), options
+                ), options['seconds'])
+
+    def run(self, mode, database, options):
+        settings_dict = connections.databases['default']
+        settings_dict.pop('PRAGMAS', None)
+        if mode['pragmas']:
+            settings_dict['PRAGMAS'] = mode['pragmas']
+        with benchmark_database(name=database), override_settings(
+            SQLITE_WRITE_QUEUE=mode['queue']
+        ):
+            author = User.objects.create(username='bench_author')
+            Post.objects.bulk_create(
+                Post(text=f'Пост {number}', author=author)
+                for number in range(options['posts'])
+            )
+            post_ids = list(Post.objects.values_list('pk', flat=True))
+            # Соединение главного потока держало бы транзакции чтения.
+            connection.close()
+            results = self.load(author, post_ids, mode['queue'], options)
+            stop_writer()
+        settings_dict.pop('PRAGMAS', None)
+        return results
+
+    @staticmethod
+    def load(author, post_ids, queue, options):
+        load = MixedLoad(author, post_ids, queue, options['seconds'])
+        threads = [
+            threading.Thread(target=load.worker, args=('read', seed))
+            for seed in range(options['readers'])
+        ] + [
+            threading.Thread(target=load.worker, args=('write', seed * 1000))
+            for seed in range(options['writers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return load.results
+
+    def report(self, mode, results, seconds):
+        reads, writes = results['read'], results['write']
+        read_p99 = summarize(reads)['p99'] if reads else 0
+        write_p99 = summarize(writes)['p99'] if writes else 0
+        self.stdout.write(
+            f'{mode:>6} {len(reads) / seconds:>8.0f} '
+            f'{len(writes) / seconds:>9.0f} {results["locked"]:>7} '
+            f'{read_p99:>13.2f} {write_p99:>14.2f}'
+        )
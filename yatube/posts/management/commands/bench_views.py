@@ -0,0 +1,174 @@
+import json
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchmark import benchmark_database, find_regressions, summarize
+from posts.models import Group, Post, User
+from posts.synthetic import Generator
+from posts.urls import app_name, urlpatterns
+
+
+def scenarios(reader, author, post, own_post, group, word):
+    """Запрос для каждого представления posts.urls: метод, адрес, данные."""
+    return {
+        'main_page': ('get', reverse('posts:main_page'), None),
+        'group_list': (
+            'get', reverse('posts:group_list', args=[group.slug]), None
+        ),
+        'profile': (
+            'get', reverse('posts:profile', args=[author.username]), None
+        ),
+        'post_detail': (
+            'get', reverse('posts:post_detail', args=[post.pk]), None
+        ),
+        'comments': ('get', reverse('posts:comments', args=[post.pk]), None),
+        'search': ('get', reverse('posts:search'), {'q': word}),
+        'feed': ('get', reverse('posts:feed', args=['atom']), None),
+        'group_feed': (
+            'get', reverse('posts:group_feed', args=[group.slug, 'rss']),
+            None
+        ),
+        'profile_feed': (
+            'get',
+            reverse('posts:profile_feed', args=[author.username, 'atom']),
+            None
+        ),
+        'follow_index': ('get', reverse('posts:follow_index'), None),
+        'post_create': ('get', reverse('posts:post_create'), None),
+        'post_edit': (
+            'get', reverse('posts:post_edit', args=[own_post.pk]), None
+        ),
+        'add_comment': (
+            'post', reverse('posts:add_comment', args=[post.pk]),
+            {'text': 'Комментарий замера'}
+        ),
+        # Повторная подписка уже ничего не меняет; отписка снимает её,
+        # и следующий прогон снова замеряет подписку с нуля.
+        'profile_follow': (
+            'get', reverse('posts:profile_follow', args=[author.username]),
+            None
+        ),
+        'profile_unfollow': (
+            'get', reverse('posts:profile_unfollow', args=[author.username]),
+            None
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку и число запросов каждого представления posts '
+        'на синтетических данных и сравнивает с прошлым прогоном'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--hot-comments', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--output', help='Куда записать результаты JSON')
+        parser.add_argument(
+            '--baseline', help='JSON прошлого прогона для сравнения'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый рост медианы, доля'
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as source:
+                baseline = json.load(source)['views']
+        with benchmark_database():
+            Generator(
+                users=options['users'],
+                posts=options['posts'],
+                hot_comments=options['hot_comments'],
+            ).run()
+            client, requests = self.prepare()
+            results = {}
+            self.stdout.write(
+                f'{"view":>26} {"median, ms":>11} {"p99, ms":>9} '
+                f'{"queries":>8}'
+            )
+            for name, request in requests.items():
+                results[name] = self.measure(
+                    client, *request, options['repeat']
+                )
+                self.stdout.write(
+                    f'{name:>26} {results[name]["median"]:>11.2f} '
+                    f'{results[name]["p99"]:>9.2f} '
+                    f'{results[name]["queries"]:>8}'
+                )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as target:
+                json.dump({
+                    'created': timezone.now().isoformat(),
+                    'options': {
+                        key: options[key]
+                        for key in ('users', 'posts', 'hot_comments', 'repeat')
+                    },
+                    'views': results,
+                }, target, ensure_ascii=False, indent=2)
+        if baseline is not None:
+            regressions = find_regressions(
+                baseline, results, options['threshold']
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    @staticmethod
+    def prepare():
+        """Выбирает самые тяжёлые страницы и логинит активного читателя."""
+        reader = User.objects.order_by('-stats__follows_count').first()
+        author = User.objects.order_by('-stats__followers_count').first()
+        post = Post.objects.order_by('-comments_count').first()
+        own_post = Post.objects.filter(author=reader).first()
+        if own_post is None:
+            own_post = Post.objects.create(text='Пост читателя', author=reader)
+        group = Group.objects.order_by('-posts__created').first()
+        word = post.text.split()[0].strip('.,')
+        requests = scenarios(reader, author, post, own_post, group, word)
+        missing = [
+            pattern.name for pattern in urlpatterns
+            if pattern.name not in requests
+        ]
+        if missing:
+            raise CommandError(f'Нет сценария для: {", ".join(missing)}')
+        # Адрес вне INTERNAL_IPS, чтобы не включался debug_toolbar.
+        client = Client(REMOTE_ADDR='10.0.0.1')
+        client.force_login(reader)
+        return client, {
+            f'{app_name}:{name}': request for name, request in requests.items()
+        }
+
+    @staticmethod
+    def measure(client, method, url, data, repeat):
+        """Задержки холодных запросов: кэш лент сбрасывается перед каждым."""
+        def send(*args):
+            # Потоковый ответ строится, пока его читают.
+            response = getattr(client, method)(*args)
+            if response.streaming:
+                b''.join(response.streaming_content)
+
+        timings = []
+        for _ in range(repeat):
+            cache.clear()
+            start = time.perf_counter()
+            send(url, data)
+            timings.append((time.perf_counter() - start) * 1000)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            send(url, data)
+        return {**summarize(timings), 'queries': len(queries)}
@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.benchmark import benchmark_database
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+# Сортировка всей выборки во временном B-дереве вместо чтения по индексу.
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+def explain(sql):
+    """Строки EXPLAIN QUERY PLAN для уже подставленного SQL."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan):
+    """Шаги плана с полным проходом по таблице или сортировкой."""
+    # Выдачу полнотекстового индекса сортирует по релевантности сам поиск.
+    ranked = any('VIRTUAL TABLE' in step for step in plan)
+    problems = []
+    for step in plan:
+        full_scan = step.startswith('SCAN ') and not any(
+            marker in step
+            for marker in ('USING', 'VIRTUAL TABLE', 'SUBQUERY', 'CONSTANT')
+        )
+        if full_scan or (step.startswith(TEMP_SORT) and not ranked):
+            problems.append(step)
+    return problems
+
+
+def view_queries(urls, user):
+    """SELECT-запросы, которые выполняет каждая страница."""
+    client = Client(REMOTE_ADDR='10.0.0.1')
+    client.force_login(user)
+    queries = {}
+    with override_settings(CACHES=DUMMY_CACHES):
+        for url in urls:
+            with CaptureQueriesContext(connection) as context:
+                client.get(url)
+            queries[url] = [
+                query['sql'] for query in context.captured_queries
+                if query['sql'].startswith('SELECT')
+            ]
+    return queries
+
+
+def seed():
+    """Минимальный набор данных, чтобы каждая страница дошла до лент."""
+    author = User.objects.create_user(username='explain_author')
+    reader = User.objects.create_user(username='explain_reader')
+    group = Group.objects.create(
+        title='Группа', slug='explain-group', description='-'
+    )
+    Follow.objects.create(user=reader, author=author)
+    post = Post.objects.create(text='Пост', author=author, group=group)
+    Comment.objects.create(post=post, author=reader, text='Коммент')
+    urls = [
+        reverse('posts:main_page'),
+        reverse('posts:group_list', args=[group.slug]),
+        reverse('posts:profile', args=[author.username]),
+        reverse('posts:post_detail', args=[post.pk]),
+        reverse('posts:comments', args=[post.pk]),
+        reverse('posts:follow_index'),
+        reverse('posts:search') + '?q=пост',
+    ]
+    return urls, reader
+
+
+def audit(urls, user):
+    """Планы запросов по страницам: {url: [(sql, план, проблемы)]}."""
+    report = {}
+    for url, queries in view_queries(urls, user).items():
+        report[url] = []
+        for sql in queries:
+            plan = explain(sql)
+            report[url].append((sql, plan, plan_problems(plan)))
+    return report
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN QUERY PLAN для запросов каждой страницы '
+        'и падает, если где-то остался полный проход по таблице'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN есть только в SQLite')
+        with benchmark_database():
+            report = audit(*seed())
+        failed = 0
+        for url, queries in report.items():
+            self.stdout.write(url)
+            for sql, plan, problems in queries:
+                failed += bool(problems)
+                style = self.style.ERROR if problems else str
+                self.stdout.write(style(f'  {sql}'))
+                for step in plan:
+                    self.stdout.write(f'    {step}')
+        if failed:
+            raise CommandError(f'Запросов без подходящего индекса: {failed}')
+        self.stdout.write(self.style.SUCCESS('Все запросы идут по индексам'))
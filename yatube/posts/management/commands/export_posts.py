@@ -0,0 +1,42 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import FORMATS, MODELS, write_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает группы, посты, комментарии и подписки '
+        'в файлы JSON Lines или CSV, по файлу на модель'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог для файлов выгрузки')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--models', nargs='+', choices=MODELS, default=list(MODELS)
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за раз'
+        )
+
+    def handle(self, *args, **options):
+        os.makedirs(options['directory'], exist_ok=True)
+        for model_name in options['models']:
+            path = os.path.join(
+                options['directory'], f'{model_name}.{options["format"]}'
+            )
+            started = time.perf_counter()
+            with open(path, 'w', newline='', encoding='utf-8') as stream:
+                count = write_rows(
+                    model_name, stream, options['format'],
+                    options['chunk_size']
+                )
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{model_name}: {count} строк за {elapsed:.1f} с '
+                f'({count / max(elapsed, 1e-9):.0f} строк/с) → {path}'
+            )
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.synthetic import Generator
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими данными: подписки по закону Ципфа '
+        'и горячие посты с тысячами комментариев'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Сколько авторов в среднем читает пользователь'
+        )
+        parser.add_argument(
+            '--comments', type=int, default=3,
+            help='Сколько комментариев в среднем у обычного поста'
+        )
+        parser.add_argument('--hot-posts', type=int, default=10)
+        parser.add_argument('--hot-comments', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = Generator(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            follows=options['follows'],
+            comments=options['comments'],
+            hot_posts=options['hot_posts'],
+            hot_comments=options['hot_comments'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        ).run()
+        for model_name, count in counts.items():
+            self.stdout.write(f'{model_name}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - started:.1f} с'
+        ))
@@ -0,0 +1,56 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import FORMATS, MODELS, read_rows, refresh_derived
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает группы, посты, комментарии и подписки из выгрузки '
+        'export_posts пачками через bulk_create'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог с файлами выгрузки')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--models', nargs='+', choices=MODELS, default=list(MODELS)
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Строк в одной пачке и одной транзакции'
+        )
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Не пересчитывать счётчики, ленты, поиск и кэш'
+        )
+
+    def handle(self, *args, **options):
+        # Модели грузятся в порядке MODELS, а не в порядке аргументов.
+        model_names = [name for name in MODELS if name in options['models']]
+        paths = {
+            name: os.path.join(
+                options['directory'], f'{name}.{options["format"]}'
+            )
+            for name in model_names
+        }
+        missing = [path for path in paths.values() if not os.path.exists(path)]
+        if missing:
+            raise CommandError(f'Нет файлов выгрузки: {", ".join(missing)}')
+        for model_name, path in paths.items():
+            started = time.perf_counter()
+            with open(path, newline='', encoding='utf-8') as stream:
+                count = read_rows(
+                    model_name, stream, options['format'],
+                    options['batch_size']
+                )
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{model_name}: {count} строк за {elapsed:.1f} с '
+                f'({count / max(elapsed, 1e-9):.0f} строк/с)'
+            )
+        if not options['skip_derived']:
+            refresh_derived()
+        self.stdout.write(self.style.SUCCESS('Импорт завершён'))
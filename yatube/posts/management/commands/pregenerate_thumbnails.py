@@ -0,0 +1,48 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import build_thumbnails, thumbnails_ready
+
+
+class Command(BaseCommand):
+    """Ключи sorl хранятся в кэше, поэтому процессы-воркеры отдают их
+    серверу только при общем бэкенде кэша (file, memcached, redis).
+    С locmem прогрев всё равно полезен: файлы миниатюр уже на диске,
+    и сервер лишь восстановит ключи без декодирования картинок.
+    """
+    help = 'Строит миниатюры для картинок постов параллельно на всех ядрах'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1
+        )
+
+    def handle(self, *args, **options):
+        images = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True
+        ).distinct()
+        names = [
+            name for name in images.iterator()
+            if not thumbnails_ready(Post(image=name).image)
+        ]
+        started = time.perf_counter()
+        # Соединения не должны переходить в дочерние процессы.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options['workers'],
+            mp_context=multiprocessing.get_context('fork'),
+        ) as executor:
+            for done, name in enumerate(
+                executor.map(build_thumbnails, names, chunksize=8), 1
+            ):
+                self.stdout.write(f'{done}/{len(names)} {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {len(names)} картинок за '
+            f'{time.perf_counter() - started:.1f} с'
+        ))
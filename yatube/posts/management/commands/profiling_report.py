@@ -0,0 +1,64 @@
+import json
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка выборки ProfilingMiddleware: перцентили времени, '
+        'SQL-запросы и попадания в кэш по представлениям'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=None)
+        parser.add_argument(
+            '--hours', type=float, default=None,
+            help='Учитывать только последние N часов'
+        )
+
+    def handle(self, *args, **options):
+        path = options['log'] or settings.PROFILING_LOG
+        if not path:
+            raise CommandError('Укажите --log или YATUBE_PROFILING_LOG')
+        since = 0
+        if options['hours'] is not None:
+            since = time.time() - options['hours'] * 3600
+        samples = defaultdict(list)
+        try:
+            with open(path) as log:
+                for line in log:
+                    sample = json.loads(line)
+                    if sample['time'] >= since:
+                        samples[sample['view']].append(sample)
+        except FileNotFoundError:
+            raise CommandError(f'Нет файла выборки {path}')
+        self.stdout.write(
+            f'{"view":<22} {"n":>6} {"p50, ms":>8} {"p95, ms":>8} '
+            f'{"p99, ms":>8} {"sql p95":>8} {"tpl p95":>8} '
+            f'{"queries":>8} {"cache hit":>9}'
+        )
+        for view, rows in sorted(samples.items()):
+            self.stdout.write(self.format_row(view, rows))
+
+    @staticmethod
+    def format_row(view, rows):
+        def column(name):
+            return sorted(row[name] for row in rows)
+
+        total = column('total_ms')
+        hits = sum(column('cache_hits'))
+        lookups = hits + sum(column('cache_misses'))
+        hit_ratio = f'{hits / lookups:.0%}' if lookups else '-'
+        queries = sum(column('queries')) / len(rows)
+        return (
+            f'{view:<22} {len(rows):>6} {percentile(total, 0.5):>8.1f} '
+            f'{percentile(total, 0.95):>8.1f} {percentile(total, 0.99):>8.1f} '
+            f'{percentile(column("sql_ms"), 0.95):>8.1f} '
+            f'{percentile(column("template_ms"), 0.95):>8.1f} '
+            f'{queries:>8.1f} {hit_ratio:>9}'
+        )
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from posts.models import Post, UserStats
+from posts.stats import count_stats
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики профилей и комментариев постов '
+        'и исправляет расхождения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только показать расхождения, ничего не меняя'
+        )
+
+    def handle(self, *args, **options):
+        stored = {
+            stats.user_id: stats for stats in UserStats.objects.all()
+        }
+        mismatched = 0
+        for user_id in User.objects.values_list('pk', flat=True).iterator():
+            actual = count_stats(user_id)
+            stats = stored.get(user_id)
+            if stats is not None and all(
+                getattr(stats, field) == value
+                for field, value in actual.items()
+            ):
+                continue
+            mismatched += 1
+            self.stdout.write(f'Пользователь {user_id}: {actual}')
+            if not options['check']:
+                UserStats.objects.update_or_create(
+                    user_id=user_id, defaults=actual
+                )
+        posts = Post.objects.annotate(actual=Count('comments')).exclude(
+            comments_count=F('actual')
+        ).values_list('pk', 'actual')
+        for post_id, actual in posts.iterator():
+            mismatched += 1
+            self.stdout.write(f'Пост {post_id}: comments_count={actual}')
+            if not options['check']:
+                Post.objects.filter(pk=post_id).update(comments_count=actual)
+        action = 'Найдено' if options['check'] else 'Исправлено'
+        self.stdout.write(
+            self.style.SUCCESS(f'{action} расхождений: {mismatched}')
+        )
@@ -0,0 +1,31 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в файлы реплик; '
+        'заменяет репликацию при локальной проверке маршрутизации'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не заданы: см. YATUBE_DB_REPLICAS')
+        primary = connections['default'].settings_dict['NAME']
+        source = sqlite3.connect(primary)
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                name = connections[alias].settings_dict['NAME']
+                target = sqlite3.connect(name)
+                try:
+                    # Онлайн-бэкап не блокирует запись в основную базу.
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: {name}')
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS('Реплики обновлены'))
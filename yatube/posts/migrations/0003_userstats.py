@@ -0,0 +1,63 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:54
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+BATCH_SIZE = 500
+
+
+def fill_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+
+    def counts(model, field):
+        return dict(
+            model.objects.order_by().values_list(field).annotate(Count('pk'))
+        )
+
+    posts = counts(Post, 'author')
+    follows = counts(Follow, 'user')
+    followers = counts(Follow, 'author')
+    comments = counts(Comment, 'author')
+    UserStats.objects.bulk_create(
+        (UserStats(
+            user_id=pk,
+            posts_count=posts.get(pk, 0),
+            follows_count=follows.get(pk, 0),
+            followers_count=followers.get(pk, 0),
+            comments_count=comments.get(pk, 0),
+        ) for pk in User.objects.values_list('pk', flat=True).iterator()),
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0002_feeditem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Всего постов')),
+                ('follows_count', models.PositiveIntegerField(default=0, verbose_name='Всего подписок')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Всего подписчиков')),
+                ('comments_count', models.PositiveIntegerField(default=0, verbose_name='Всего комментариев')),
+            ],
+            options={
+                'verbose_name': 'Статистика пользователя',
+                'verbose_name_plural': 'Статистика пользователей',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
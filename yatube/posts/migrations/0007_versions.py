@@ -0,0 +1,68 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:41
+
+from django.db import migrations, models, transaction
+from django.db.models import F
+import django.utils.timezone
+
+BATCH_SIZE = 10000
+
+
+def backfill_modified(apps, schema_editor):
+    """Старые записи не правились: дата изменения равна дате создания.
+
+    Обновляется по BATCH_SIZE строк в транзакции, чтобы не держать
+    блокировку всей таблицы на больших базах.
+    """
+    for model_name in ('Post', 'Comment'):
+        model = apps.get_model('posts', model_name)
+        last = model.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        for start in range(0, last, BATCH_SIZE):
+            with transaction.atomic():
+                model.objects.filter(
+                    pk__gt=start, pk__lte=start + BATCH_SIZE
+                ).update(modified=F('created'))
+
+
+class Migration(migrations.Migration):
+    # Заполнение идёт пачками, каждая в своей транзакции.
+    atomic = False
+
+    dependencies = [
+        ('posts', '0006_post_comments_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Обновляется при каждом сохранении', verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Растёт при каждом сохранении', verbose_name='Версия'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Обновляется при каждом сохранении', verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Растёт при каждом сохранении', verbose_name='Версия'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Обновляется при каждом сохранении', verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Растёт при каждом сохранении', verbose_name='Версия'),
+        ),
+        migrations.RunPython(backfill_modified, migrations.RunPython.noop),
+    ]
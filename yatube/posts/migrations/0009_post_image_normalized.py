@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+# Только имена, которые даёт конвейер: <хеш>.<ширина>w.<расширение>.
+# Остальные картинки нормализует команда normalize_images.
+NORMALIZED_NAME_RE = r'(^|/)[0-9a-f]{64}\.[0-9]+w\.[a-z]+$'
+
+
+def mark_normalized(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.filter(image__regex=NORMALIZED_NAME_RE).update(
+        image_normalized=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_stored_files'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_normalized',
+            field=models.BooleanField(default=False, editable=False, help_text='Ставит конвейер posts.images, сбрасывает новая загрузка', verbose_name='Картинка нормализована'),
+        ),
+        migrations.RunPython(mark_normalized, migrations.RunPython.noop),
+    ]
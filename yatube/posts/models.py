@@ -1,13 +1,16 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 
-from core.models import CreatedModel
+from core.models import CreatedModel, VersionedModel
+
+from .storage import post_image_storage
 
 User = get_user_model()
 LETTERS_IN_POST = 15
 
 
-class Group(models.Model):
+class Group(VersionedModel):
     title = models.CharField(
         verbose_name='Название Группы',
         max_length=200,
@@ -29,7 +32,23 @@ class Group(models.Model):
         return self.title
 
 
-class Post(CreatedModel):
+class PostQuerySet(models.QuerySet):
+    FEED_DEFERRED_FIELDS = (
+        'group__description',
+        'author__password',
+        'author__email',
+        'author__last_login',
+        'author__date_joined',
+    )
+
+    def for_feed(self):
+        """Посты для лент: автор и группа одним запросом, без лишних полей."""
+        return self.select_related('author', 'group').defer(
+            *self.FEED_DEFERRED_FIELDS
+        )
+
+
+class Post(CreatedModel, VersionedModel):
 
     CUSTOM_POST_NUM = 15
 
@@ -54,12 +73,38 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=post_image_storage,
         blank=True
     )
+    image_normalized = models.BooleanField(
+        'Картинка нормализована',
+        default=False,
+        editable=False,
+        help_text='Ставит конвейер posts.images, сбрасывает новая загрузка'
+    )
+    comments_count = models.PositiveIntegerField(
+        'Всего комментариев',
+        default=0,
+        editable=False,
+        help_text='Счётчик обновляется сигналами комментариев'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         default_related_name = 'posts'
         ordering = ('-created',)
+        indexes = [
+            models.Index(fields=['-created'], name='post_created_idx'),
+            models.Index(
+                fields=['author', '-created'],
+                name='post_author_created_idx'
+            ),
+            models.Index(
+                fields=['group', '-created'],
+                name='post_group_created_idx'
+            ),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -67,7 +112,7 @@ class Post(CreatedModel):
         return self.text[:LETTERS_IN_POST]
 
 
-class Comment(CreatedModel):
+class Comment(CreatedModel, VersionedModel):
     post = models.ForeignKey(
         Post,
         blank=True, null=True,
@@ -92,6 +137,12 @@ class Comment(CreatedModel):
     class Meta:
         default_related_name = 'comments'
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created'],
+                name='comment_post_created_idx'
+            ),
+        ]
         verbose_name = 'Коммент'
         verbose_name_plural = 'Комменты'
 
@@ -129,3 +180,95 @@ class Follow(CreatedModel):
         ]
         verbose_name = 'Избранный автор'
         verbose_name_plural = 'Избранные авторы'
+
+
+class FeedItem(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Читатель',
+        help_text='Чья это лента подписок'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Пост',
+        help_text='Пост автора, на которого подписан читатель'
+    )
+    created = models.DateTimeField(
+        'Дата создания поста',
+        help_text='Копия Post.created для сортировки ленты'
+    )
+
+    class Meta:
+        ordering = ('-created',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_feed_item'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-created'],
+                name='feed_user_created_idx'
+            ),
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики для страницы профиля."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Всего постов', default=0)
+    follows_count = models.PositiveIntegerField('Всего подписок', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Всего подписчиков', default=0
+    )
+    comments_count = models.PositiveIntegerField(
+        'Всего комментариев', default=0
+    )
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class ScopeVersion(models.Model):
+    """Счётчик правок области лент: по нему строятся ETag и Last-Modified."""
+    scope = models.CharField('Область', max_length=255, unique=True)
+    version = models.PositiveIntegerField('Версия', default=1)
+    modified = models.DateTimeField('Дата изменения', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Версия области'
+        verbose_name_plural = 'Версии областей'
+
+    def __str__(self):
+        return self.scope
+
+
+class StoredFile(models.Model):
+    """Число постов, ссылающихся на файл в хранилище картинок."""
+    name = models.CharField('Имя файла', max_length=255, unique=True)
+    references = models.PositiveIntegerField('Ссылок', default=0)
+
+    class Meta:
+        verbose_name = 'Файл хранилища'
+        verbose_name_plural = 'Файлы хранилища'
+
+    def __str__(self):
+        return self.name
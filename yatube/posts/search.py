@@ -0,0 +1,193 @@
+import math
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Post
+from .utils import pack_token, parse_integer, unpack_token
+
+WORD_RE = re.compile(r'\w+')
+
+
+class SearchBackend:
+    """Интерфейс поискового индекса по постам.
+
+    search возвращает id постов в порядке релевантности и токен
+    курсора следующей страницы (или None).
+    """
+
+    def index(self, post):
+        raise NotImplementedError
+
+    def remove(self, post_id):
+        raise NotImplementedError
+
+    def reindex_group(self, group):
+        raise NotImplementedError
+
+    def reindex_author(self, user):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def search(self, query, limit, cursor=None):
+        raise NotImplementedError
+
+
+class IContainsBackend(SearchBackend):
+    """Поиск через LIKE '%…%' без индекса: запасной путь и эталон."""
+
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def reindex_group(self, group):
+        pass
+
+    def reindex_author(self, user):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit, cursor=None):
+        words = WORD_RE.findall(query)
+        if not words:
+            return [], None
+        condition = Q()
+        for word in words:
+            condition &= (
+                Q(text__icontains=word)
+                | Q(group__title__icontains=word)
+                | Q(author__username__icontains=word)
+            )
+        posts = Post.objects.filter(condition).order_by('-pk')
+        if cursor:
+            try:
+                pk, = unpack_token(cursor)
+                posts = posts.filter(pk__lt=parse_integer(pk))
+            except (ValueError, TypeError):
+                pass
+        ids = list(posts.values_list('pk', flat=True)[:limit + 1])
+        next_cursor = pack_token(ids[limit - 1]) if len(ids) > limit else None
+        return ids[:limit], next_cursor
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """Инвертированный индекс SQLite FTS5 с ранжированием по BM25.
+
+    Таблица posts_search создаётся миграцией; rowid совпадает с id поста.
+    """
+    table = 'posts_search'
+    # Вес совпадения в тексте, названии группы и имени автора.
+    weights = (1.0, 0.5, 0.5)
+
+    def _author_name(self, user):
+        return ' '.join(
+            part for part in (user.get_full_name(), user.username) if part
+        )
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {self.table} '
+                f'(rowid, text, group_title, author_name) '
+                f'VALUES (%s, %s, %s, %s)',
+                [post.pk, post.text, post.group.title if post.group else '',
+                 self._author_name(post.author)]
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [post_id]
+            )
+
+    def reindex_group(self, group):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {self.table} SET group_title = %s WHERE rowid IN '
+                f'(SELECT id FROM posts_post WHERE group_id = %s)',
+                [group.title, group.pk]
+            )
+
+    def reindex_author(self, user):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {self.table} SET author_name = %s WHERE rowid IN '
+                f'(SELECT id FROM posts_post WHERE author_id = %s)',
+                [self._author_name(user), user.pk]
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} '
+                f'(rowid, text, group_title, author_name) '
+                f"SELECT p.id, p.text, COALESCE(g.title, ''), "
+                f"TRIM(u.first_name || ' ' || u.last_name || ' ' "
+                f'|| u.username) '
+                f'FROM posts_post p '
+                f'JOIN auth_user u ON u.id = p.author_id '
+                f'LEFT JOIN posts_group g ON g.id = p.group_id'
+            )
+
+    @staticmethod
+    def match_expression(query):
+        """Слова запроса как префиксы, все обязательны."""
+        return ' '.join(
+            '"{}"*'.format(word) for word in WORD_RE.findall(query)
+        )
+
+    def search(self, query, limit, cursor=None):
+        expression = self.match_expression(query)
+        if not expression:
+            return [], None
+        sql = (
+            f'SELECT rowid, score FROM ('
+            f'SELECT rowid, bm25({self.table}, %s, %s, %s) AS score '
+            f'FROM {self.table} WHERE {self.table} MATCH %s)'
+        )
+        params = [*self.weights, expression]
+        position = None
+        if cursor:
+            try:
+                score, pk = unpack_token(cursor)
+                position = float(score), parse_integer(pk)
+            except (ValueError, TypeError):
+                position = None
+            if position is not None and not math.isfinite(position[0]):
+                position = None
+        if position is not None:
+            sql += ' WHERE score > %s OR (score = %s AND rowid > %s)'
+            params += [position[0], position[0], position[1]]
+        sql += ' ORDER BY score, rowid LIMIT %s'
+        params.append(limit + 1)
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(sql, params)
+            rows = db_cursor.fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = pack_token(*rows[limit - 1][::-1])
+        return [pk for pk, _ in rows[:limit]], next_cursor
+
+
+def get_backend():
+    return import_string(settings.SEARCH_BACKEND)()
+
+
+def search_posts(query, limit, cursor=None):
+    """Посты для выдачи поиска в порядке релевантности."""
+    ids, next_cursor = get_backend().search(query, limit, cursor)
+    posts = Post.objects.for_feed().in_bulk(ids)
+    return [posts[pk] for pk in ids if pk in posts], next_cursor
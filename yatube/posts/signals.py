@@ -0,0 +1,144 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, feed, stats
+from .images import schedule_normalize
+from .search import get_backend as search_backend
+from .storage import post_image_storage
+from .models import Comment, Follow, Group, Post, User
+from .thumbnails import schedule_thumbnails
+
+
+def _group_scope(group_id):
+    slug = Group.objects.filter(pk=group_id).values_list(
+        'slug', flat=True
+    ).first()
+    return [f'group:{slug}'] if slug else []
+
+
+def _profile_scope(*user_ids):
+    usernames = User.objects.filter(pk__in=user_ids).values_list(
+        'username', flat=True
+    )
+    return [f'profile:{username}' for username in usernames]
+
+
+def invalidate_post_feeds(post, *group_ids):
+    scopes = ['index', f'post:{post.pk}'] + _profile_scope(post.author_id)
+    for group_id in {post.group_id, *group_ids} - {None}:
+        scopes += _group_scope(group_id)
+    caching.invalidate(*scopes)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_state(sender, instance, raw=False, **kwargs):
+    instance._previous_group_id = instance._previous_image = None
+    # Новую загрузку сохранит хранилище, и ссылку на неё возьмёт оно же.
+    instance._image_retained = bool(
+        instance.image and not instance.image._committed
+    )
+    if instance._image_retained or not instance.image:
+        instance.image_normalized = False
+    if not instance.pk or raw:
+        return
+    previous = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', 'image', 'comments_count'
+    ).first()
+    if previous is not None:
+        # Счётчик ведут сигналы комментариев: сохранение поста из формы
+        # не должно затирать его значением, прочитанным до правки.
+        (instance._previous_group_id, instance._previous_image,
+         instance.comments_count) = previous
+
+
+def count_image_references(name, previous, retained=False):
+    """Одинаковые загрузки делят файл: он живёт, пока на него ссылаются."""
+    if name and not retained:
+        post_image_storage.retain(name)
+    if previous:
+        post_image_storage.release(previous)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        feed.fan_out(instance)
+        stats.bump(instance.author_id, 'posts_count', 1)
+    if instance.image.name != instance._previous_image:
+        count_image_references(
+            instance.image.name, instance._previous_image,
+            instance._image_retained
+        )
+        # Миниатюры строятся из уже нормализованной картинки.
+        if instance.image_normalized:
+            schedule_thumbnails(instance.image.name)
+        elif instance.image:
+            schedule_normalize(instance.image.name)
+    search_backend().index(instance)
+    invalidate_post_feeds(instance, instance._previous_group_id)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    count_image_references(None, instance.image.name)
+    stats.bump(instance.author_id, 'posts_count', -1)
+    search_backend().remove(instance.pk)
+    invalidate_post_feeds(instance)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.bump(instance.author_id, 'comments_count', 1)
+        stats.bump_comments(instance.post_id, 1)
+        caching.invalidate(
+            f'post:{instance.post_id}', *_profile_scope(instance.author_id)
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    stats.bump(instance.author_id, 'comments_count', -1)
+    stats.bump_comments(instance.post_id, -1)
+    caching.invalidate(
+        f'post:{instance.post_id}', *_profile_scope(instance.author_id)
+    )
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.bump(instance.user_id, 'follows_count', 1)
+        stats.bump(instance.author_id, 'followers_count', 1)
+        feed.backfill(instance)
+        caching.invalidate(
+            *_profile_scope(instance.user_id, instance.author_id)
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def prune_feed(sender, instance, **kwargs):
+    stats.bump(instance.user_id, 'follows_count', -1)
+    stats.bump(instance.author_id, 'followers_count', -1)
+    feed.prune(instance)
+    feed.schedule_catch_up(instance.author_id)
+    caching.invalidate(*_profile_scope(instance.user_id, instance.author_id))
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search_backend().reindex_group(instance)
+        caching.invalidate(f'group:{instance.slug}')
+
+
+@receiver(post_save, sender=User)
+def reindex_author(sender, instance, created, raw=False,
+                   update_fields=None, **kwargs):
+    # Вход пользователя сохраняет только last_login: индекс не трогаем.
+    names = {'username', 'first_name', 'last_name'}
+    if created or raw or (update_fields and not names & set(update_fields)):
+        return
+    search_backend().reindex_author(instance)
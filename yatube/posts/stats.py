@@ -0,0 +1,63 @@
+from django.db import IntegrityError, router, transaction
+from django.db.models import F
+
+from .models import Comment, Follow, Post, UserStats
+
+
+def count_stats(user_id):
+    """Считает счётчики пользователя заново агрегатными запросами."""
+    return {
+        'posts_count': Post.objects.filter(author=user_id).count(),
+        'follows_count': Follow.objects.filter(user=user_id).count(),
+        'followers_count': Follow.objects.filter(author=user_id).count(),
+        'comments_count': Comment.objects.filter(author=user_id).count(),
+    }
+
+
+def find_stats(**lookups):
+    """Готовая строка счётчиков или None; ничего не создаёт."""
+    # Срез вместо first(): запросу по одной строке не нужен ORDER BY.
+    return next(iter(UserStats.objects.filter(**lookups)[:1]), None)
+
+
+def get_stats(user):
+    """Возвращает строку счётчиков, создавая её при первом обращении."""
+    try:
+        return UserStats.objects.get(user=user)
+    except UserStats.DoesNotExist:
+        pass
+    try:
+        with transaction.atomic():
+            return UserStats.objects.create(
+                user=user, **count_stats(user.pk)
+            )
+    except IntegrityError:
+        # Строку создал параллельный запрос; реплика могла её ещё не получить.
+        return UserStats.objects.using(
+            router.db_for_write(UserStats)
+        ).get(user=user)
+
+
+def bump(user_id, field, delta):
+    """Атомарно сдвигает счётчик через F(), не уходя ниже нуля."""
+    stats = UserStats.objects.filter(user=user_id)
+    if delta < 0:
+        stats = stats.filter(**{f'{field}__gte': -delta})
+        stats.update(**{field: F(field) + delta})
+    elif not stats.update(**{field: F(field) + delta}):
+        # Строки ещё нет: создаём её уже с учётом нового объекта.
+        try:
+            with transaction.atomic():
+                UserStats.objects.create(
+                    user_id=user_id, **count_stats(user_id)
+                )
+        except IntegrityError:
+            stats.update(**{field: F(field) + delta})
+
+
+def bump_comments(post_id, delta):
+    """Сдвигает денормализованный счётчик комментариев поста."""
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comments_count__gte=-delta)
+    posts.update(comments_count=F('comments_count') + delta)
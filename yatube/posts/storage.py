@@ -0,0 +1,200 @@
+"""Хранилище картинок постов с адресацией по содержимому.
+
+Файл называется SHA-256 своего содержимого и лежит в каталоге по первым
+символам хеша: posts/3f/a2/3fa2….jpg, так что в одном каталоге не
+скапливаются тысячи файлов. Одинаковые загрузки ложатся в один файл,
+второй раз он не пишется и миниатюры для него не строятся заново.
+Производные файлы (нормализованная картинка и её копии из posts.images)
+лежат рядом под тем же хешем: posts/3f/a2/3fa2….1920w.jpg.
+
+Число ссылок на файл хранит StoredFile, его ведут сигналы Post.
+Файл удаляется после коммита, когда ссылок не осталось, а вместе с
+последним файлом семейства уходят и производные.
+
+Удаление и повторное использование готового файла не должны
+разминуться: save берёт ссылку раньше, чем проверяет, есть ли файл,
+а удаление начинает транзакцию с удаления записи без ссылок. В SQLite
+запись в транзакции одна на базу, поэтому проверка ссылок и удаление
+файлов не перемежаются с чужой retain. Производный файл удаляется
+только вместе со всем семейством: пока на семейство ссылаются,
+save_derived может вернуть его повторно.
+
+ContentAddressedMixin пользуется только API Storage (exists, save,
+delete, listdir): для объектного хранилища достаточно подмешать его
+к классу бэкенда и указать получившийся класс в POST_IMAGE_STORAGE.
+"""
+import hashlib
+import logging
+import os
+import posixpath
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, get_storage_class
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils.deconstruct import deconstructible
+
+from core.writes import run_write
+
+logger = logging.getLogger(__name__)
+
+HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _stored_files():
+    return apps.get_model('posts', 'StoredFile').objects
+
+
+def _root(name):
+    return os.path.splitext(name)[0]
+
+
+def _family(name):
+    """Общий корень файла и его производных: каталог и хеш."""
+    directory, file_name = posixpath.split(name)
+    return posixpath.join(directory, file_name.partition('.')[0])
+
+
+class ContentAddressedMixin:
+    """Имена по хешу содержимого, дедупликация и счётчики ссылок."""
+
+    def content_name(self, name, content):
+        """Имя файла по SHA-256 содержимого в каталоге name."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        return posixpath.join(
+            posixpath.dirname(name), digest[:2], digest[2:4],
+            digest + os.path.splitext(name)[1].lower()
+        )
+
+    def save(self, name, content, max_length=None):
+        """Сохраняет файл и берёт на него ссылку.
+
+        Ссылку сигналы Post не берут повторно для загрузки, сохранённой
+        вместе с постом.
+        """
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        # Файл со ссылкой не удалит и удаление, начатое раньше: retain
+        # ждёт конца его транзакции, а тогда файла уже нет.
+        run_write(self.retain, name)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def save_derived(self, name, suffix, content):
+        """Сохраняет файл, полученный из name, под именем <корень>.suffix.
+
+        Из одного содержимого выходит одно и то же, поэтому готовый файл
+        не перезаписывается. У старых имён без хеша корень может совпасть
+        у разных картинок: там существующий файл не переиспользуется.
+        Пока на name есть ссылка, производные файлы не удаляются.
+        """
+        target = f'{_root(name)}.{suffix}'
+        if self.exists(target) and self.is_content_addressed(name):
+            return target
+        return super().save(target, content)
+
+    @staticmethod
+    def is_content_addressed(name):
+        return bool(HASH_RE.match(posixpath.basename(_family(name))))
+
+    def retain(self, name):
+        """Добавляет ссылку на файл."""
+        files = _stored_files()
+        if files.filter(name=name).update(references=F('references') + 1):
+            return
+        try:
+            with transaction.atomic():
+                files.create(name=name, references=1)
+        except IntegrityError:
+            # Параллельная загрузка того же файла успела создать запись.
+            files.filter(name=name).update(references=F('references') + 1)
+
+    def release(self, name):
+        """Снимает ссылку; файл без ссылок удаляется после коммита."""
+        _stored_files().filter(name=name, references__gt=0).update(
+            references=F('references') - 1
+        )
+        transaction.on_commit(lambda: self._delete_quietly(name))
+
+    def _delete_quietly(self, name):
+        # Запись уже зафиксирована: сбой хранилища оставит лишь лишний файл.
+        try:
+            self.delete_unreferenced(name)
+        except Exception:
+            logger.exception('Не удалось удалить файл %s', name)
+
+    def delete_unreferenced(self, name):
+        """Удаляет файл, если на него не ссылаются, и сирот-производных."""
+        run_write(self._delete_unreferenced, name)
+
+    def _delete_unreferenced(self, name):
+        files = _stored_files()
+        with transaction.atomic():
+            # Первой командой — запись: блокировка базы держится до конца
+            # транзакции, и retain не вклинится между проверкой и удалением.
+            if not files.filter(name=name, references=0).delete()[0]:
+                return
+            family = _family(name)
+            if files.filter(
+                name__startswith=f'{family}.', references__gt=0
+            ).exists():
+                if _root(name) == family:
+                    # Оригинал: производные от него остаются.
+                    self.delete(name)
+                return
+            files.filter(name__startswith=f'{family}.').delete()
+            directory, prefix = posixpath.split(family)
+            if not self.exists(directory):
+                return
+            for file_name in self.listdir(directory)[1]:
+                if file_name.startswith(f'{prefix}.'):
+                    self.delete(posixpath.join(directory, file_name))
+
+
+@deconstructible
+class ContentAddressedStorage(ContentAddressedMixin, FileSystemStorage):
+    """Адресация по содержимому в MEDIA_ROOT."""
+
+
+@deconstructible
+class PostImageStorage:
+    """Хранилище картинок постов из настройки POST_IMAGE_STORAGE.
+
+    Не LazyObject: миграции разворачивают его до класса из настроек,
+    а в поле должен остаться этот посредник.
+    """
+    _backend = None
+
+    def __getattr__(self, name):
+        if self._backend is None:
+            self._backend = get_storage_class(
+                settings.POST_IMAGE_STORAGE
+            )()
+        return getattr(self._backend, name)
+
+
+post_image_storage = PostImageStorage()
+
+
+def rebuild_references():
+    """Пересчитывает ссылки по постам, например после импорта."""
+    files = _stored_files()
+    counts = apps.get_model('posts', 'Post').objects.exclude(
+        image=''
+    ).order_by().values('image').annotate(references=Count('pk'))
+    with transaction.atomic():
+        files.all().delete()
+        files.bulk_create([
+            files.model(name=row['image'], references=row['references'])
+            for row in counts.iterator()
+        ])
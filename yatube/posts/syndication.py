@@ -0,0 +1,146 @@
+"""Atom и RSS для общей ленты, групп и авторов.
+
+Документ отдаётся потоком: шапка, затем по куску на пост из итератора
+QuerySet, затем хвост. Готовый документ кэшируется по версиям тех же
+областей, что и HTML-ленты, поэтому новый пост в группе или у автора
+сбрасывает и его ленту.
+"""
+from io import StringIO
+from itertools import chain
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.feedgenerator import (
+    Atom1Feed, Rss201rev2Feed, SimplerXMLGenerator
+)
+from django.utils.text import Truncator
+
+from .caching import _digest, feed_timeout, scope_state, scope_versions
+
+FEED_KEY = 'syndication:{}'
+TITLE_WORDS = 10
+
+
+class StreamingFeedMixin:
+    # Закрывающий тег, перед которым идут записи.
+    closing = None
+    latest = None
+
+    def latest_post_date(self):
+        return self.latest or super().latest_post_date()
+
+    def stream(self, items, updated=None):
+        """Куски документа; items — словари аргументов add_item.
+
+        updated — последняя правка среди всех записей: правка старого
+        поста тоже меняет дату ленты. Первая запись читается сразу:
+        запрос уходит, пока представление ещё выбирает базу, остальные
+        дочитываются при отдаче ответа.
+        """
+        items = iter(items)
+        first = next(items, None)
+        if first is None:
+            return self._chunks(items)
+        self.latest = max(
+            first['pubdate'], first['updateddate'],
+            updated or first['updateddate']
+        )
+        return self._chunks(chain([first], items))
+
+    def _chunks(self, items):
+        buffer = StringIO()
+        self.write(buffer, 'utf-8')
+        document = buffer.getvalue()
+        split = document.rindex(self.closing)
+        yield document[:split]
+        handler = SimplerXMLGenerator(buffer, 'utf-8')
+        for item in items:
+            buffer.seek(0)
+            buffer.truncate()
+            self.items = []
+            self.add_item(**item)
+            self.write_items(handler)
+            yield buffer.getvalue()
+        yield document[split:]
+
+
+class AtomFeed(StreamingFeedMixin, Atom1Feed):
+    closing = '</feed>'
+
+
+class RssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    closing = '</channel>'
+
+
+FORMATS = {'atom': AtomFeed, 'rss': RssFeed}
+
+
+def _updated(posts):
+    """Время последней правки среди постов, попавших в ленту."""
+    window = posts.values('pk')[:settings.SYNDICATION_ITEMS]
+    return posts.model.objects.filter(pk__in=window).aggregate(
+        updated=Max('modified')
+    )['updated']
+
+
+def _items(request, posts):
+    posts = posts.for_feed()[:settings.SYNDICATION_ITEMS]
+    for post in posts.iterator(chunk_size=settings.SYNDICATION_ITEMS):
+        link = request.build_absolute_uri(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        yield {
+            'title': Truncator(post.text).words(TITLE_WORDS),
+            'link': link,
+            'unique_id': link,
+            'description': post.text,
+            'pubdate': post.created,
+            'updateddate': post.modified,
+            'author_name': (
+                post.author.get_full_name() or post.author.username
+            ),
+            'categories': [post.group.title] if post.group else None,
+        }
+
+
+def _cached(key, chunks):
+    """Отдаёт куски дальше и кладёт документ в кэш, когда он готов."""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, ''.join(parts), feed_timeout())
+
+
+def feed_class(feed_format):
+    """Класс ленты по формату из адреса; неизвестный формат — 404."""
+    if feed_format not in FORMATS:
+        raise Http404('Неизвестный формат ленты')
+    return FORMATS[feed_format]
+
+
+def feed_response(request, feed_format, scopes, posts, title, link,
+                  description=''):
+    """Ответ с лентой feed_format по постам posts."""
+    feed = feed_class(feed_format)(
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=description or title,
+        feed_url=request.build_absolute_uri(),
+        language=settings.LANGUAGE_CODE,
+    )
+    content_type = feed.content_type
+    key = FEED_KEY.format(_digest(
+        feed_format, request.build_absolute_uri(),
+        *scopes, *scope_versions(scopes), scope_state(request, scopes)[0]
+    ))
+    document = cache.get(key)
+    if document is not None:
+        return HttpResponse(document, content_type=content_type)
+    return StreamingHttpResponse(
+        _cached(key, feed.stream(_items(request, posts), _updated(posts))),
+        content_type=content_type,
+    )
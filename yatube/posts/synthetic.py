@@ -0,0 +1,173 @@
+"""Генератор правдоподобных данных для нагрузочных замеров.
+
+Популярность авторов подчиняется закону Ципфа: немногие авторы
+собирают большую часть подписчиков и пишут большую часть постов,
+поэтому самые популярные переходят порог FEED_FANOUT_LIMIT.
+У нескольких «горячих» постов тысячи комментариев, у остальных — единицы.
+Тексты берутся из Faker, на котором построен mixer тестовых фикстур:
+mixer сохраняет объекты по одному, а здесь нужны миллионы строк.
+"""
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.utils import timezone
+from faker import Faker
+
+from .models import Comment, Follow, Group, Post, User
+from .transfer import bulk_insert, refresh_derived
+
+SENTENCES = 2000
+# Показатель закона Ципфа для популярности авторов.
+ZIPF_EXPONENT = 1.1
+GROUP_SHARE = 0.7
+DAYS = 365
+
+
+def zipf_weights(count, exponent=ZIPF_EXPONENT):
+    """Накопленные веса рангов 1..count для random.choices."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def _new_ids(model, before):
+    return list(
+        model.objects.filter(pk__gt=before).order_by('pk').values_list(
+            'pk', flat=True
+        )
+    )
+
+
+def _last_id(model):
+    return model.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 0
+
+
+def _numbered(model, objects):
+    """Проставляет id после последнего: по ним bulk_insert вернёт даты."""
+    for pk, obj in enumerate(objects, _last_id(model) + 1):
+        obj.pk = pk
+        yield obj
+
+
+class Generator:
+    """Создаёт пользователей, группы, подписки, посты и комментарии."""
+
+    def __init__(self, users=1000, groups=20, posts=100000, follows=20,
+                 comments=3, hot_posts=10, hot_comments=2000, seed=0,
+                 batch_size=1000):
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.follows = follows
+        self.comments = comments
+        self.hot_posts = hot_posts
+        self.hot_comments = hot_comments
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(seed)
+        self.sentences = [self.faker.sentence() for _ in range(SENTENCES)]
+        self.now = timezone.now()
+
+    def text(self, words=3):
+        return ' '.join(self.rng.sample(
+            self.sentences, self.rng.randint(1, words)
+        ))
+
+    def created(self):
+        return self.now - timedelta(seconds=self.rng.uniform(0, DAYS * 86400))
+
+    def dates(self):
+        """Даты новой записи: она ещё не правилась."""
+        created = self.created()
+        return {'created': created, 'modified': created}
+
+    def run(self):
+        """Наполняет базу и возвращает число созданных строк по моделям."""
+        counts = {}
+        before = _last_id(User)
+        counts['user'] = bulk_insert(User, (
+            User(
+                username=f'user{before + number}',
+                first_name=self.faker.first_name(),
+                last_name=self.faker.last_name(),
+                password='!',
+            )
+            for number in range(self.users)
+        ), self.batch_size)
+        # Ранг популярности автора не совпадает с порядком создания.
+        authors = _new_ids(User, before)
+        self.rng.shuffle(authors)
+        weights = zipf_weights(len(authors))
+
+        before = _last_id(Group)
+        counts['group'] = bulk_insert(Group, (
+            Group(
+                title=self.faker.catch_phrase(),
+                slug=f'group-{before + number}',
+                description=self.text(),
+            )
+            for number in range(self.groups)
+        ), self.batch_size)
+        groups = _new_ids(Group, before)
+
+        counts['follow'] = bulk_insert(
+            Follow, _numbered(Follow, self.follow_rows(authors, weights)),
+            self.batch_size
+        )
+
+        before = _last_id(Post)
+        counts['post'] = bulk_insert(Post, _numbered(Post, (
+            Post(
+                text=self.text(),
+                author_id=self.rng.choices(authors, cum_weights=weights)[0],
+                group_id=(
+                    self.rng.choice(groups)
+                    if groups and self.rng.random() < GROUP_SHARE else None
+                ),
+                **self.dates(),
+            )
+            for _ in range(self.posts)
+        )), self.batch_size)
+        posts = _new_ids(Post, before)
+
+        counts['comment'] = bulk_insert(
+            Comment, _numbered(Comment, self.comment_rows(posts, authors)),
+            self.batch_size
+        )
+        refresh_derived()
+        return counts
+
+    def follow_rows(self, authors, weights):
+        """Каждый читает в среднем follows авторов, выбранных по Ципфу."""
+        for user in authors:
+            wanted = self.rng.randint(1, 2 * self.follows - 1)
+            chosen = set(
+                self.rng.choices(authors, cum_weights=weights, k=wanted)
+            )
+            chosen.discard(user)
+            for author in chosen:
+                yield Follow(user_id=user, author_id=author,
+                             created=self.created())
+
+    def comment_rows(self, posts, authors):
+        """Горячим постам по hot_comments, остальным в среднем comments."""
+        if not posts:
+            return
+        hot = self.rng.sample(posts, min(self.hot_posts, len(posts)))
+        targets = (post for post in hot for _ in range(self.hot_comments))
+        for post in targets:
+            yield self.comment(post, authors)
+        for _ in range(self.comments * len(posts)):
+            yield self.comment(self.rng.choice(posts), authors)
+
+    def comment(self, post, authors):
+        return Comment(
+            post_id=post,
+            author_id=self.rng.choice(authors),
+            text=self.text(1),
+            **self.dates(),
+        )
@@ -0,0 +1,10 @@
+from django import template
+
+from posts.images import srcset
+
+register = template.Library()
+
+
+@register.filter(name='srcset')
+def image_srcset(post):
+    return srcset(post.image.name) if post.image_normalized else ''
@@ -0,0 +1,131 @@
+from datetime import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+from django.utils.timezone import utc
+
+from posts import caching
+from posts.models import Comment, Group, Post, User
+
+from .constants import REVERSE_INDEX
+
+
+class FeedCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cache_author')
+        Post.objects.create(text='First post', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_stale_page_is_served_while_rebuilding(self):
+        """Пока страницу строит другой процесс, отдаётся прошлая версия"""
+        self.client.get(REVERSE_INDEX)
+        Post.objects.create(text='Second post', author=self.user)
+        with mock.patch.object(cache, 'add', return_value=False):
+            response = self.client.get(REVERSE_INDEX)
+        self.assertIsNone(response.context)
+        self.assertEqual(response['X-Feed-Cache'], 'STALE')
+        self.assertNotContains(response, 'Second post')
+        response = self.client.get(REVERSE_INDEX)
+        self.assertContains(response, 'Second post')
+
+    def test_foreign_lock_is_kept(self):
+        """Без своей блокировки страница строится, но чужая не снимается"""
+        with mock.patch.object(cache, 'add', return_value=False), \
+                mock.patch.object(cache, 'delete') as delete:
+            response = self.client.get(REVERSE_INDEX)
+        self.assertEqual(response['X-Feed-Cache'], 'MISS')
+        delete.assert_not_called()
+
+    @override_settings(FEED_CACHE_TIMEOUT=3600, FEED_CACHE_LOCAL_TIMEOUT=20)
+    def test_local_cache_keeps_short_timeout(self):
+        """С locmem ленты живут недолго: инвалидация не общая"""
+        self.assertEqual(caching.feed_timeout(), 20)
+
+    def test_version_keys_are_hashed_and_expire(self):
+        """Ключ версии не содержит имени области и имеет срок"""
+        with mock.patch.object(cache, 'add', wraps=cache.add) as add:
+            caching.scope_versions(['profile:имя с пробелом'])
+        key, _, timeout = add.call_args[0]
+        self.assertNotIn('имя', key)
+        self.assertIsNotNone(timeout)
+
+    def test_edit_invalidates_old_and_new_group(self):
+        """Правка поста сбрасывает ленты, где он был и где появился"""
+        old = Group.objects.create(title='Old', slug='old', description='-')
+        new = Group.objects.create(title='New', slug='new', description='-')
+        post = Post.objects.create(text='Moving', author=self.user, group=old)
+        self.assertContains(self.client.get('/group/old/'), 'Moving')
+        self.assertNotContains(self.client.get('/group/new/'), 'Moving')
+        post.group = new
+        post.save()
+        self.assertNotContains(self.client.get('/group/old/'), 'Moving')
+        self.assertContains(self.client.get('/group/new/'), 'Moving')
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='etag_author')
+        cls.post = Post.objects.create(text='Etag post', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.detail = f'/posts/{self.post.pk}/'
+
+    def test_unchanged_page_is_not_rendered(self):
+        """Повторный запрос с ETag получает 304 без запросов к постам"""
+        response = self.client.get(REVERSE_INDEX)
+        # На каждый ответ — один запрос к счётчику версий области.
+        with self.assertNumQueries(2):
+            cached = self.client.get(
+                REVERSE_INDEX, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+            modified = self.client.get(
+                REVERSE_INDEX, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(modified.status_code, 304)
+
+    def test_comment_and_edit_change_etag(self):
+        """Новый комментарий и правка поста дают новый ETag"""
+        etag = self.client.get(self.detail)['ETag']
+        # Автор и группа поста, затем счётчики их областей.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(post=self.post, author=self.user, text='New')
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'New')
+        etag = response['ETag']
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Edited'
+        post.save()
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Edited')
+
+    def test_change_within_second_is_not_hidden(self):
+        """Смена версии в ту же секунду не прячется за If-Modified-Since"""
+        changed = datetime(2020, 1, 1, 0, 0, 0, 500000, tzinfo=utc)
+        with mock.patch('posts.caching.timezone.now', return_value=changed):
+            caching.invalidate('index')
+        response = self.client.get(
+            REVERSE_INDEX,
+            HTTP_IF_MODIFIED_SINCE=http_date(int(changed.timestamp()))
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_validators_survive_cache_loss(self):
+        """ETag не зависит от кэша процесса: его потеря не даёт новый ETag"""
+        etag = self.client.get(REVERSE_INDEX)['ETag']
+        cache.clear()
+        response = self.client.get(REVERSE_INDEX, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
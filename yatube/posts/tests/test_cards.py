@@ -0,0 +1,41 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.cards import render_cards
+from posts.models import Group, Post, User
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='card_author')
+        cls.group = Group.objects.create(
+            title='Test group',
+            slug='card_group',
+            description='Test desc',
+        )
+        cls.post = Post.objects.create(text='Card text', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_cached_cards_are_not_rendered_again(self):
+        """Повторный вывод карточки берётся из кэша"""
+        render_cards([self.post])
+        with mock.patch('posts.cards.get_template') as get_template:
+            (post, card), = render_cards([self.post])
+        get_template.return_value.render.assert_not_called()
+        self.assertIn('Card text', card)
+
+    def test_edited_post_gets_new_card(self):
+        """Правка текста или группы меняет карточку"""
+        render_cards([self.post])
+        self.post.text = 'Edited text'
+        self.post.group = self.group
+        self.post.save()
+        (post, card), = render_cards([self.post])
+        self.assertIn('Edited text', card)
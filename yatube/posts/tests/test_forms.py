@@ -2,7 +2,6 @@ import shutil
 import tempfile
 from http import HTTPStatus
 
-from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
@@ -18,9 +17,10 @@ from .constants import (
     POST_EDIT_URL_NAME,
     SMALL_GIF
 )
+from .utils import drain_background_pools
 from ..models import Group, Post, User, Comment
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -72,6 +72,7 @@ class PostFormTests(TestCase):
 
     @classmethod
     def tearDownClass(cls):
+        drain_background_pools()
         super().tearDownClass()
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from posts.images import normalize_image, srcset
+from posts.models import Post, StoredFile, User
+
+from .utils import drain_background_pools
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+# Тег EXIF Orientation: 6 — повернуть на 90° по часовой.
+ORIENTATION = 0x0112
+
+
+def _upload(name, image_format, size, mode='RGB', **options):
+    buffer = BytesIO()
+    Image.new(mode, size, 'red').save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class NormalizeImageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='image_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        drain_background_pools()
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_photo_is_rotated_downscaled_and_stripped(self):
+        """Фото поворачивается по EXIF, уменьшается и теряет метаданные"""
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        post = Post.objects.create(
+            text='Фото', author=self.user,
+            image=_upload('photo.jpg', 'JPEG', (3000, 1000), quality=100,
+                          exif=exif.tobytes()),
+        )
+        original = post.image.name
+        root = os.path.splitext(original)[0]
+        report = normalize_image(original)
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, f'{root}.640w.jpg')
+        self.assertTrue(post.image_normalized)
+        self.assertEqual(post.version, 2)
+        self.assertEqual(
+            StoredFile.objects.get(name=original).references, 0
+        )
+        self.assertGreater(report.bytes_saved, 0)
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (640, 1920))
+            self.assertTrue(image.info.get('progressive'))
+            self.assertNotIn('exif', image.info)
+        with Image.open(post.image.storage.path(f'{root}.480w.jpg')) as image:
+            self.assertEqual(image.width, 480)
+        self.assertEqual(
+            srcset(post.image.name),
+            f'/media/{root}.480w.jpg 480w, /media/{root}.640w.jpg 640w'
+        )
+        response = self.client.get(f'/posts/{post.pk}/')
+        self.assertContains(response, f'srcset="/media/{root}.480w.jpg')
+
+    def test_transparent_png_stays_png(self):
+        """Прозрачная картинка не перекодируется в JPEG"""
+        post = Post.objects.create(
+            text='Логотип', author=self.user,
+            image=_upload('logo.png', 'PNG', (100, 50), mode='RGBA'),
+        )
+        root = os.path.splitext(post.image.name)[0]
+        normalize_image(post.image.name)
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, f'{root}.100w.png')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.mode, 'RGBA')
+
+    def test_only_new_uploads_are_normalized(self):
+        """Нормализация ставится для загрузки, миниатюры — для результата"""
+        with mock.patch('posts.signals.schedule_normalize') as normalize, \
+                mock.patch('posts.signals.schedule_thumbnails') as thumbnails:
+            post = Post.objects.create(
+                text='Пост', author=self.user,
+                image=_upload('new.jpg', 'JPEG', (10, 10)),
+            )
+            normalize.assert_called_once_with(post.image.name)
+            thumbnails.assert_not_called()
+            post.image.name = 'posts/ab/cd/abcd.10w.jpg'
+            post.image_normalized = True
+            post.save()
+        thumbnails.assert_called_once_with(post.image.name)
+
+    def test_upload_name_does_not_mark_image_normalized(self):
+        """Имя загрузки с шириной не выдаёт её за нормализованную"""
+        with mock.patch('posts.signals.schedule_normalize') as normalize:
+            post = Post.objects.create(
+                text='Пост', author=self.user,
+                image=_upload('x.2000w.jpg', 'JPEG', (10, 10)),
+            )
+        normalize.assert_called_once_with(post.image.name)
+        self.assertFalse(post.image_normalized)
+        response = self.client.get(f'/posts/{post.pk}/')
+        self.assertNotContains(response, 'srcset=')
+
+    def test_new_upload_resets_flag(self):
+        """Новая картинка снова проходит нормализацию"""
+        post = Post.objects.create(
+            text='Пост', author=self.user,
+            image=_upload('a.jpg', 'JPEG', (10, 10)),
+        )
+        normalize_image(post.image.name)
+        post.refresh_from_db()
+        self.assertTrue(post.image_normalized)
+        post.image = _upload('b.jpg', 'JPEG', (20, 20))
+        post.save()
+        self.assertFalse(post.image_normalized)
@@ -1,4 +1,7 @@
+from django.db import connection
+from django.db.models.signals import post_save
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from posts.models import (
     Group,
@@ -103,3 +106,54 @@ class PostAppModelTest(TestCase):
                     self.assertEqual(
                         model_name._meta.get_field(
                             help_field).help_text, help_text)
+
+    def test_save_bumps_version_and_modified(self):
+        """Сохранение увеличивает версию и обновляет дату правки"""
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.version, 1)
+        modified = post.modified
+        post.text = 'Правка'
+        post.save()
+        self.assertEqual(post.version, 2)
+        self.assertGreater(post.modified, modified)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save(update_fields=['title'])
+        self.assertEqual(
+            Group.objects.values_list('version', flat=True).get(
+                pk=group.pk
+            ),
+            2
+        )
+
+    def test_receivers_see_number_without_reread(self):
+        """Получатели post_save видят число, строка не перечитывается"""
+        seen = []
+
+        def receiver(sender, instance, **kwargs):
+            seen.append(instance.version)
+
+        post_save.connect(receiver, sender=Post)
+        self.addCleanup(post_save.disconnect, receiver, sender=Post)
+        post = Post.objects.get(pk=self.post.pk)
+        with CaptureQueriesContext(connection) as context:
+            post.save(update_fields=['text'])
+        self.assertEqual(seen, [2])
+        self.assertFalse(any(
+            query['sql'].startswith('SELECT "posts_post"."version"')
+            for query in context.captured_queries
+        ))
+
+    def test_stale_copy_does_not_lose_increment(self):
+        """Сохранение устаревшей копии не теряет чужое приращение"""
+        first = Post.objects.get(pk=self.post.pk)
+        second = Post.objects.get(pk=self.post.pk)
+        first.save()
+        second.save()
+        self.assertEqual(second.version, 3)
+        self.assertEqual(
+            Post.objects.values_list('version', flat=True).get(
+                pk=self.post.pk
+            ),
+            3
+        )
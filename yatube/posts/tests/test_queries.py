@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.management.commands.explain_views import audit, seed
+from posts.models import Follow, Group, Post, User
+from yatube.settings import LATEST_POSTS_COUNT
+
+from .constants import (
+    REVERSE_FOLLOW_INDEX,
+    REVERSE_GROUP_LIST,
+    REVERSE_INDEX,
+    REVERSE_PROFILE,
+    SLUG,
+    USERNAME,
+)
+
+# Бюджет запросов на страницу ленты не зависит от числа постов на ней.
+# Условные ленты читают ещё и счётчик версий для ETag.
+FEED_QUERY_BUDGET = {
+    REVERSE_INDEX: 2,
+    REVERSE_GROUP_LIST: 3,
+    REVERSE_PROFILE: 5,
+    REVERSE_FOLLOW_INDEX: 2,
+}
+
+
+class FeedQueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Test group',
+            slug=SLUG,
+            description='Test desc',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for number in range(LATEST_POSTS_COUNT + 1):
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.user, group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client.force_login(self.reader)
+
+    def test_feed_pages_fit_query_budget(self):
+        """Ленты укладываются в фиксированное число запросов"""
+        for url, budget in FEED_QUERY_BUDGET.items():
+            with self.subTest(url=url):
+                # Сессия и пользователь: два запроса сверх бюджета ленты.
+                with self.assertNumQueries(budget + 2):
+                    response = self.client.get(url)
+                self.assertEqual(
+                    len(response.context['page_obj']), LATEST_POSTS_COUNT
+                )
+
+
+class QueryPlanTest(TestCase):
+    def test_view_queries_use_indexes(self):
+        """Запросы страниц не читают таблицы целиком"""
+        for url, queries in audit(*seed()).items():
+            for sql, plan, problems in queries:
+                with self.subTest(url=url, sql=sql):
+                    self.assertEqual(problems, [], plan)
@@ -0,0 +1,83 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.search import IContainsBackend, SQLiteFTSBackend, search_posts
+from posts.utils import pack_token
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='searcher', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Классика', slug='classic', description='-'
+        )
+        cls.war = Post.objects.create(
+            text='Война и мир, том первый', author=cls.user, group=cls.group
+        )
+        cls.peace = Post.objects.create(
+            text='Мирное утро', author=cls.user
+        )
+        cls.other = Post.objects.create(
+            text='Совсем другое', author=cls.user
+        )
+
+    def test_text_group_and_author_are_indexed(self):
+        cases = (
+            ('война', [self.war]),
+            ('КЛАССИКА', [self.war]),
+            ('толстой совсем', [self.other]),
+            ('мир', [self.war, self.peace]),
+            ('!!!', []),
+        )
+        for query, expected in cases:
+            with self.subTest(query=query):
+                posts, _ = search_posts(query, 10)
+                self.assertCountEqual(posts, expected)
+
+    def test_index_follows_edits_and_deletes(self):
+        other = Post.objects.get(pk=self.other.pk)
+        other.text = 'Теперь про войну'
+        other.save()
+        self.assertIn(other, search_posts('войну', 10)[0])
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Романы'
+        group.save()
+        self.assertEqual(search_posts('романы', 10)[0], [self.war])
+        Post.objects.filter(pk=self.war.pk).delete()
+        self.assertEqual(search_posts('романы', 10)[0], [])
+
+    def test_cursor_pages_do_not_overlap(self):
+        first, cursor = search_posts('толстой', 2)
+        second, last_cursor = search_posts('толстой', 2, cursor)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertIsNone(last_cursor)
+        self.assertFalse(set(first) & set(second))
+
+    def test_crafted_cursor_starts_from_first_page(self):
+        """Испорченный курсор не роняет поиск, а даёт первую страницу"""
+        cursors = (
+            pack_token(10 ** 30), pack_token(1.0, 10 ** 30), 'e30',
+            pack_token(float('inf'), 1), pack_token(float('nan'), 1),
+        )
+        for backend in (IContainsBackend(), SQLiteFTSBackend()):
+            expected, _ = backend.search('толстой', 2)
+            for cursor in cursors:
+                with self.subTest(backend=backend, cursor=cursor):
+                    ids, _ = backend.search('толстой', 2, cursor)
+                    self.assertEqual(ids, expected)
+
+    @override_settings(SEARCH_BACKEND='posts.search.IContainsBackend')
+    def test_icontains_backend(self):
+        posts, _ = search_posts('Мирное', 10)
+        self.assertEqual(posts, [self.peace])
+
+    def test_search_page(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'утро'})
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertContains(response, 'Мирное утро')
@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Post, User, UserStats
+from posts.stats import count_stats
+
+from .constants import REVERSE_PROFILE, USERNAME
+
+
+class UserStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Test text', author=cls.user)
+        Comment.objects.create(post=cls.post, author=cls.user, text='Hi')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def test_counters_follow_signals(self):
+        """Счётчики меняются при создании и удалении объектов"""
+        self.assertEqual(
+            UserStats.objects.filter(user=self.user).values(
+                'posts_count', 'follows_count',
+                'followers_count', 'comments_count'
+            ).get(),
+            count_stats(self.user.pk)
+        )
+        Follow.objects.filter(user=self.reader).delete()
+        Post.objects.filter(pk=self.post.pk).delete()
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual(stats.followers_count, 0)
+        self.assertEqual(stats.posts_count, 0)
+        self.assertEqual(stats.comments_count, 0)
+
+    def test_profile_uses_counters(self):
+        """Профиль выводит счётчики без агрегатных запросов"""
+        UserStats.objects.filter(user=self.user).update(posts_count=42)
+        response = self.client.get(REVERSE_PROFILE)
+        self.assertContains(response, 'Всего постов: 42')
+
+    def test_rebuild_stats_fixes_drift(self):
+        UserStats.objects.filter(user=self.user).update(posts_count=42)
+        out = StringIO()
+        call_command('rebuild_stats', '--check', stdout=out)
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count, 42)
+        call_command('rebuild_stats', stdout=out)
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count, 1)
+
+    def test_post_comments_count(self):
+        """Счётчик комментариев поста не сбивается правкой поста"""
+        post = Post.objects.get(pk=self.post.pk)
+        Comment.objects.create(post=post, author=self.reader, text='Ещё')
+        post.text = 'Правка'
+        post.save()
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 2)
+        Comment.objects.filter(author=self.reader).delete()
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+        Post.objects.filter(pk=post.pk).update(comments_count=7)
+        call_command('rebuild_stats', stdout=StringIO())
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
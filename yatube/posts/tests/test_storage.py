@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+
+from posts.models import Post, StoredFile, User
+from posts.storage import post_image_storage as storage
+
+from .constants import SMALL_GIF
+from .utils import drain_background_pools
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def _gif(name):
+    return SimpleUploadedFile(name, SMALL_GIF, content_type='image/gif')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(shutil.rmtree, TEMP_MEDIA_ROOT, ignore_errors=True)
+        self.addCleanup(drain_background_pools)
+        # Фоновая нормализация после коммита здесь не нужна.
+        for name in ('schedule_normalize', 'schedule_thumbnails'):
+            patcher = mock.patch(f'posts.signals.{name}')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='storage_author')
+
+    def test_same_upload_is_stored_once(self):
+        """Повторная загрузка того же файла не пишет его заново"""
+        first = Post.objects.create(
+            text='Первый', author=self.user, image=_gif('a.gif')
+        )
+        second = Post.objects.create(
+            text='Второй', author=self.user, image=_gif('b.gif')
+        )
+        name = first.image.name
+        self.assertEqual(second.image.name, name)
+        directory, file_name = os.path.split(name)
+        self.assertEqual(directory, f'posts/{file_name[:2]}/{file_name[2:4]}')
+        self.assertEqual(storage.listdir(directory)[1], [file_name])
+        self.assertEqual(StoredFile.objects.get(name=name).references, 2)
+
+    def test_file_is_deleted_with_last_reference(self):
+        """Файл и производные удаляются вместе с последним постом"""
+        first = Post.objects.create(
+            text='Первый', author=self.user, image=_gif('a.gif')
+        )
+        second = Post.objects.create(
+            text='Второй', author=self.user, image=_gif('b.gif')
+        )
+        name = first.image.name
+        derived = storage.save_derived(name, '480w.jpg', ContentFile(b'x'))
+        first.delete()
+        self.assertTrue(storage.exists(name))
+        second.delete()
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(storage.exists(derived))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+
+    def test_replaced_image_is_released(self):
+        """Смена картинки снимает ссылку со старой"""
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=_gif('a.gif')
+        )
+        old = post.image.name
+        post.image = SimpleUploadedFile('c.gif', SMALL_GIF + b'\0')
+        post.save()
+        self.assertNotEqual(post.image.name, old)
+        self.assertFalse(storage.exists(old))
+        self.assertEqual(
+            StoredFile.objects.get(name=post.image.name).references, 1
+        )
+
+    def test_reused_file_survives_pending_delete(self):
+        """Удаление, назначенное до повторной загрузки, не трогает файл"""
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=_gif('a.gif')
+        )
+        name = post.image.name
+        StoredFile.objects.filter(name=name).update(references=0)
+        self.assertEqual(storage.save('posts/b.gif', _gif('b.gif')), name)
+        storage.delete_unreferenced(name)
+        self.assertTrue(storage.exists(name))
+        self.assertEqual(StoredFile.objects.get(name=name).references, 1)
+
+    def test_derived_file_is_kept_while_family_is_referenced(self):
+        """Производный файл живёт, пока есть ссылки на его семейство"""
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=_gif('a.gif')
+        )
+        derived = storage.save_derived(
+            post.image.name, '480w.jpg', ContentFile(b'x')
+        )
+        StoredFile.objects.create(name=derived, references=0)
+        storage.delete_unreferenced(derived)
+        self.assertTrue(storage.exists(derived))
+        self.assertEqual(
+            storage.save_derived(
+                post.image.name, '480w.jpg', ContentFile(b'x')
+            ),
+            derived
+        )
@@ -0,0 +1,123 @@
+from unittest import mock
+from xml.etree import ElementTree
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+
+from posts.models import Group, Post, User
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+def _content(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class SyndicationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='feed_author', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Классики', slug='classics', description='Проза'
+        )
+        Post.objects.create(text='Старый пост', author=cls.user)
+        Post.objects.create(
+            text='Пост в группе', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.group_atom = reverse(
+            'posts:group_feed', args=[self.group.slug, 'atom']
+        )
+
+    def test_atom_and_rss_list_posts(self):
+        """Atom и RSS отдаются потоком и содержат посты ленты"""
+        response = self.client.get(reverse('posts:feed', args=['atom']))
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith(
+            'application/atom+xml'
+        ))
+        root = ElementTree.fromstring(_content(response))
+        titles = [
+            entry.find(f'{ATOM}title').text
+            for entry in root.iter(f'{ATOM}entry')
+        ]
+        self.assertEqual(titles, ['Пост в группе', 'Старый пост'])
+        self.assertEqual(
+            root.find(f'{ATOM}entry/{ATOM}author/{ATOM}name').text,
+            'Лев Толстой'
+        )
+        response = self.client.get(
+            reverse('posts:profile_feed', args=[self.user.username, 'rss'])
+        )
+        root = ElementTree.fromstring(_content(response))
+        self.assertEqual(len(root.findall('channel/item')), 2)
+        self.assertEqual(
+            root.find('channel/item/category').text, self.group.title
+        )
+
+    def test_feed_is_cached_until_new_post_in_group(self):
+        """Лента берётся из кэша, пока в группе не появится пост"""
+        _content(self.client.get(self.group_atom))
+        # Группа и счётчик версий; постов лента из кэша не читает.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.group_atom)
+        self.assertFalse(response.streaming)
+        Post.objects.create(
+            text='Свежий пост', author=self.user, group=self.group
+        )
+        response = self.client.get(self.group_atom)
+        self.assertIn('Свежий пост', _content(response).decode())
+
+    def test_edit_of_older_post_moves_feed_date(self):
+        """Правка старого поста меняет дату всей ленты"""
+        old = Post.objects.get(text='Старый пост')
+        old.text = 'Старый пост, исправленный'
+        old.save()
+        old.refresh_from_db()
+        root = ElementTree.fromstring(
+            _content(self.client.get(reverse('posts:feed', args=['atom'])))
+        )
+        updated = parse_datetime(root.find(f'{ATOM}updated').text)
+        self.assertEqual(updated.replace(microsecond=0),
+                         old.modified.replace(microsecond=0))
+
+    def test_unchanged_feed_answers_304(self):
+        """Повторный запрос с ETag получает 304"""
+        response = self.client.get(self.group_atom)
+        _content(response)
+        response = self.client.get(
+            self.group_atom, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_format_is_404(self):
+        """Формат, кроме atom и rss, даёт 404"""
+        response = self.client.get(reverse('posts:feed', args=['json']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_missing_owner_is_404_before_conditional_get(self):
+        """Лента несуществующей группы или автора — 404, а не 304"""
+        for url in (
+            reverse('posts:group_feed', args=['missing', 'atom']),
+            reverse('posts:profile_feed', args=['missing', 'rss']),
+            reverse('posts:feed', args=['bogus']),
+        ):
+            with self.subTest(url=url), \
+                    mock.patch.object(cache, 'add') as add:
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=http_date(2 ** 32)
+                )
+                self.assertEqual(response.status_code, 404)
+                # Версия области для неё не заводится.
+                add.assert_not_called()
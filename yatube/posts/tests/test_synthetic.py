@@ -0,0 +1,52 @@
+import statistics
+
+from django.test import TestCase
+
+from posts.management.commands.bench_views import scenarios
+from posts.models import Comment, FeedItem, Follow, Post, User, UserStats
+from posts.synthetic import Generator
+from posts.urls import urlpatterns
+
+
+class GeneratorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.counts = Generator(
+            users=60, groups=3, posts=300, follows=5,
+            comments=1, hot_posts=2, hot_comments=50
+        ).run()
+
+    def test_counts(self):
+        self.assertEqual(self.counts['user'], User.objects.count())
+        self.assertEqual(self.counts['post'], 300)
+        self.assertEqual(self.counts['comment'], 2 * 50 + 300)
+        self.assertEqual(self.counts['follow'], Follow.objects.count())
+
+    def test_followers_follow_power_law(self):
+        """У самых популярных авторов подписчиков много больше медианы"""
+        followers = list(UserStats.objects.order_by(
+            '-followers_count'
+        ).values_list('followers_count', flat=True))
+        self.assertGreater(followers[0], 4 * statistics.median(followers))
+
+    def test_hot_posts_and_derived_data(self):
+        """Горячие посты с сотнями комментариев, счётчики и ленты готовы"""
+        hot = Post.objects.order_by('-comments_count')[:2]
+        for post in hot:
+            self.assertGreaterEqual(post.comments_count, 50)
+            self.assertEqual(
+                post.comments_count,
+                Comment.objects.filter(post=post).count()
+            )
+        self.assertTrue(FeedItem.objects.exists())
+
+    def test_benchmark_covers_every_view(self):
+        post = Post.objects.first()
+        requests = scenarios(
+            post.author, post.author, post, post,
+            Post.objects.exclude(group=None).first().group, 'слово'
+        )
+        self.assertEqual(
+            set(requests), {pattern.name for pattern in urlpatterns}
+        )
@@ -0,0 +1,60 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from posts.models import Post, User
+from posts.thumbnails import build_thumbnails, thumbnails_ready
+
+from .constants import SMALL_GIF
+from .utils import drain_background_pools
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class DeferredThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='thumb_author')
+        cls.post = Post.objects.create(
+            text='Post with image',
+            author=cls.user,
+            image=SimpleUploadedFile(
+                name='thumb.gif',
+                content=SMALL_GIF,
+                content_type='image/gif'
+            )
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        drain_background_pools()
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_request_does_not_build_thumbnail(self):
+        """Страница поста не строит миниатюру, а ставит задачу"""
+        with mock.patch(
+            'posts.thumbnails.schedule_thumbnails'
+        ) as schedule:
+            response = self.client.get(f'/posts/{self.post.pk}/')
+        schedule.assert_called_with(self.post.image.name)
+        # Пока миниатюры нет, вместо тяжёлого оригинала — заглушка.
+        self.assertNotContains(response, self.post.image.url)
+        self.assertContains(response, 'role="img"')
+        self.assertFalse(thumbnails_ready(self.post.image))
+
+    def test_built_thumbnail_is_used(self):
+        build_thumbnails(self.post.image.name)
+        self.assertTrue(thumbnails_ready(self.post.image))
+        response = self.client.get(f'/posts/{self.post.pk}/')
+        self.assertContains(response, 'cache/')
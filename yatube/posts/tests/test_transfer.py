@@ -0,0 +1,70 @@
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import (
+    Comment, FeedItem, Follow, Group, Post, User, UserStats
+)
+
+from .constants import USERNAME
+
+
+class TransferCommandsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username=USERNAME)
+        self.reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.post = Post.objects.create(
+            text='Пост, с "кавычками"\nи переводом строки',
+            author=self.user, group=group
+        )
+        Post.objects.create(text='Без группы', author=self.user)
+        Comment.objects.create(post=self.post, author=self.reader, text='Hi')
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.created = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        Post.objects.filter(pk=self.post.pk).update(created=self.created)
+
+    def snapshot(self):
+        return {
+            model: list(model.objects.order_by('pk').values())
+            for model in (Group, Post, Comment, Follow)
+        }
+
+    def round_trip(self, file_format):
+        before = self.snapshot()
+        with tempfile.TemporaryDirectory() as directory:
+            out = StringIO()
+            call_command(
+                'export_posts', directory, '--format', file_format,
+                '--chunk-size', '1', stdout=out
+            )
+            self.assertIn('post: 2 строк', out.getvalue())
+            Group.objects.all().delete()
+            Post.objects.all().delete()
+            Follow.objects.all().delete()
+            UserStats.objects.all().delete()
+            call_command(
+                'import_posts', directory, '--format', file_format,
+                '--batch-size', '1', stdout=out
+            )
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).created, self.created
+        )
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count, 2)
+        self.assertEqual(
+            FeedItem.objects.filter(user=self.reader).count(), 2
+        )
+
+    def test_jsonl_round_trip(self):
+        """Выгрузка JSON Lines загружается обратно без потерь"""
+        self.round_trip('jsonl')
+
+    def test_csv_round_trip(self):
+        """Выгрузка CSV загружается обратно без потерь"""
+        self.round_trip('csv')
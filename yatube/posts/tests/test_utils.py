@@ -0,0 +1,55 @@
+from django.test import TestCase
+
+from posts.models import Post, User
+from posts.utils import CursorPaginator, decode_cursor, encode_cursor
+
+PER_PAGE = 3
+POSTS_COUNT = 8
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cursor_user')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user)
+            for i in range(POSTS_COUNT)
+        )
+        cls.expected = list(Post.objects.order_by('-created', '-pk'))
+
+    def test_first_page_without_count(self):
+        """Первая страница выбирается одним запросом без COUNT(*)."""
+        paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+        with self.assertNumQueries(1):
+            page, next_cursor, previous_cursor = paginator.cursor_page()
+        self.assertEqual(list(page), self.expected[:PER_PAGE])
+        self.assertEqual(page.number, 1)
+        self.assertIsNotNone(next_cursor)
+        self.assertIsNone(previous_cursor)
+
+    def test_walk_forward_and_back(self):
+        """Курсоры проходят ленту без пропусков и возвращаются назад."""
+        paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+        seen, token, pages = [], None, []
+        while True:
+            page, token, previous_cursor = paginator.cursor_page(token)
+            seen.extend(page)
+            pages.append((list(page), previous_cursor))
+            if token is None:
+                break
+        self.assertEqual(seen, self.expected)
+        _, previous_cursor = pages[-1]
+        page, _, _ = paginator.cursor_page(previous_cursor)
+        self.assertEqual(list(page), pages[-2][0])
+        self.assertEqual(page.number, len(pages) - 1)
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+        created = self.expected[0].created
+        for token in ('garbage', '!!!', encode_cursor(created, 1, 0),
+                      encode_cursor(created, 10 ** 30, 1)):
+            with self.subTest(token=token):
+                self.assertIsNone(decode_cursor(token))
+                page, _, _ = paginator.cursor_page(token)
+                self.assertEqual(list(page), self.expected[:PER_PAGE])
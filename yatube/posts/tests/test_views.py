@@ -1,14 +1,16 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django import forms
-from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from posts import feed
 from posts.models import Post, Group, User, Comment, Follow
+from posts.thumbnails import build_thumbnails
 from yatube.settings import LATEST_POSTS_COUNT
 
 from .constants import (
@@ -22,8 +24,9 @@ from .constants import (
     GROUP_LIST_URL_NAME,
     SMALL_GIF
 )
+from .utils import drain_background_pools
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -73,24 +76,27 @@ class PostsViewsTest(TestCase):
 
     @classmethod
     def tearDownClass(cls):
+        drain_background_pools()
         super().tearDownClass()
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def test_cache_index(self):
-        """Проверка хранения и очищения кэша для index."""
+        """Кэш index отдаётся повторно и сбрасывается новым постом."""
+        cache.clear()
+        # Страницы с заглушками вместо миниатюр не кэшируются.
+        build_thumbnails(self.post.image.name)
         response = self.authorized_client.get(REVERSE_INDEX)
         posts = response.content
+        response_cached = self.authorized_client.get(REVERSE_INDEX)
+        self.assertIsNone(response_cached.context)
+        self.assertEqual(response_cached.content, posts)
         Post.objects.create(
             text='test_new_post',
             author=self.author,
         )
-        response_old = self.authorized_client.get(REVERSE_INDEX)
-        old_posts = response_old.content
-        self.assertEqual(old_posts, posts)
-        cache.clear()
         response_new = self.authorized_client.get(REVERSE_INDEX)
-        new_posts = response_new.content
-        self.assertNotEqual(old_posts, new_posts)
+        self.assertNotEqual(response_new.content, posts)
+        self.assertContains(response_new, 'test_new_post')
 
     def test_index_show_correct_context(self):
         """Шаблон index.html сформирован с правильным контекстом."""
@@ -205,3 +211,100 @@ class FollowTest(TestCase):
         self.authorized_client.get(self.REVERSE_PROFILE_FOLLOW)
         response = self.authorized_client.get(REVERSE_FOLLOW_INDEX)
         self.assertEqual(response.context.get('post')[0], self.post)
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_celebrity_posts_are_read_on_demand(self):
+        """Посты авторов без раскладки попадают в ленту при чтении"""
+        self.authorized_client.get(self.REVERSE_PROFILE_FOLLOW)
+        post = Post.objects.create(
+            text='Celebrity post',
+            author=self.auth_user_author,
+        )
+        self.assertFalse(post.feed_items.exists())
+        response = self.authorized_client.get(REVERSE_FOLLOW_INDEX)
+        self.assertIn(post, response.context['page_obj'])
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_former_celebrity_posts_are_laid_out(self):
+        """Посты времён знаменитости остаются в ленте после отписок"""
+        other = User.objects.create_user(username='other_reader')
+        self.authorized_client.get(self.REVERSE_PROFILE_FOLLOW)
+        Follow.objects.create(user=other, author=self.auth_user_author)
+        post = Post.objects.create(
+            text='Celebrity post',
+            author=self.auth_user_author,
+        )
+        self.assertFalse(post.feed_items.exists())
+        # Раскладка уходит в фоновый пул после коммита, а не в запрос.
+        with mock.patch('posts.feed._submit') as submit, mock.patch(
+            'posts.feed.transaction.on_commit', lambda func: func()
+        ):
+            Follow.objects.get(user=other).delete()
+        submit.assert_called_once_with(self.auth_user_author.pk)
+        self.assertFalse(post.feed_items.exists())
+        feed.catch_up(self.auth_user_author.pk)
+        response = self.authorized_client.get(REVERSE_FOLLOW_INDEX)
+        self.assertIn(post, response.context['page_obj'])
+
+    def test_repeated_catch_up_is_merged(self):
+        """Повторные переходы порога, пока проход ждёт, дают один проход"""
+        self.addCleanup(feed._pending.clear)
+        self.addCleanup(feed.stop_feed_workers)
+        with mock.patch('posts.feed.ThreadPoolExecutor') as executor:
+            feed._submit(self.auth_user_author.pk)
+            feed._submit(self.auth_user_author.pk)
+        executor.return_value.submit.assert_called_once()
+
+    def test_feed_is_materialized_and_pruned(self):
+        """Подписка наполняет ленту, отписка её очищает"""
+        self.authorized_client.get(self.REVERSE_PROFILE_FOLLOW)
+        new_post = Post.objects.create(
+            text='New post',
+            author=self.auth_user_author,
+        )
+        self.assertEqual(
+            set(self.auth_user.feed_items.values_list('post', flat=True)),
+            {self.post.pk, new_post.pk}
+        )
+        self.authorized_client.get(self.REVERSE_PROFILE_UNFOLLOW)
+        self.assertFalse(self.auth_user.feed_items.exists())
+
+
+@override_settings(COMMENTS_PER_PAGE=2)
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.post = Post.objects.create(text='Test text', author=cls.user)
+        for number in range(5):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Коммент {number}'
+            )
+
+    def test_comments_are_paginated(self):
+        """Первая страница рендерится в посте, остальные подгружаются"""
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Коммент 4', 'Коммент 3']
+        )
+        self.assertContains(response, 'Комментариев:</b> 5')
+        seen = []
+        cursor = response.context['comments_cursor']
+        while cursor:
+            response = self.client.get(
+                reverse('posts:comments', args=[self.post.pk]),
+                {'cursor': cursor}
+            )
+            self.assertTemplateUsed(response, 'includes/comment_list.html')
+            seen += [comment.text for comment in response.context['comments']]
+            cursor = response.context['comments_cursor']
+        self.assertEqual(seen, ['Коммент 2', 'Коммент 1', 'Коммент 0'])
+
+    def test_comments_of_missing_post_are_not_found(self):
+        """Комментарии несуществующего поста отдают 404"""
+        response = self.client.get(reverse('posts:comments', args=[0]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,15 @@
+from posts.feed import stop_feed_workers
+from posts.images import stop_normalizers
+from posts.thumbnails import stop_builders
+
+
+def drain_background_pools():
+    """Дожидается фоновой обработки картинок и лент.
+
+    Зовётся до того, как тест вернёт настоящий MEDIA_ROOT: иначе поток
+    пула допишет файлы уже в него. Нормализация ставит миниатюры,
+    поэтому её пул останавливается первым.
+    """
+    stop_normalizers()
+    stop_builders()
+    stop_feed_workers()
@@ -0,0 +1,153 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import KVStoreBase
+
+from .storage import post_image_storage
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = set()
+
+
+class CacheKVStore(KVStoreBase):
+    """Хранилище ключей sorl в кэше Django, без обращений к БД.
+
+    Фоновые потоки пишут сюда результат, не конкурируя с запросами за
+    базу. Если запись вытеснена, файл миниатюры уже лежит в хранилище и
+    повторная постановка в пул только восстанавливает ключ.
+    """
+
+    def _get_raw(self, key):
+        return cache.get(key)
+
+    def _set_raw(self, key, value):
+        cache.set(key, value, None)
+
+    def _delete_raw(self, *keys):
+        cache.delete_many(keys)
+
+    def _find_keys_raw(self, prefix):
+        # Кэш не умеет перечислять ключи, очистка по префиксу недоступна.
+        return []
+
+
+class DeferredThumbnailBackend(ThumbnailBackend):
+    """Не строит миниатюры во время запроса.
+
+    Если миниатюры ещё нет в хранилище ключей sorl, её построение
+    ставится в фоновый пул, а шаблон получает пустое значение и выводит
+    заглушку из блока {% empty %}.
+    """
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        """Файл миниатюры с теми же именем и опциями, что у sorl."""
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def ready_thumbnail(self, file_, geometry_string, **options):
+        return default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, **options)
+        )
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if getattr(_state, 'generating', False):
+            return super().get_thumbnail(file_, geometry_string, **options)
+        thumbnail = self.ready_thumbnail(file_, geometry_string, **options)
+        if thumbnail is None:
+            _state.deferred = True
+            schedule_thumbnails(getattr(file_, 'name', file_))
+        return thumbnail
+
+
+def reset_deferred():
+    _state.deferred = False
+
+
+def was_deferred():
+    """Выводилась ли в текущем потоке заглушка вместо миниатюры."""
+    return getattr(_state, 'deferred', False)
+
+
+def thumbnails_ready(image):
+    """Готовы ли все размеры из POST_THUMBNAIL_SIZES для картинки."""
+    if not image:
+        return True
+    backend = DeferredThumbnailBackend()
+    return all(
+        backend.ready_thumbnail(image, geometry, **options)
+        for geometry, options in settings.POST_THUMBNAIL_SIZES
+    )
+
+
+def build_thumbnails(name):
+    """Строит все размеры миниатюр картинки в текущем потоке."""
+    # Ключи sorl включают класс хранилища: берём то же, что у поля.
+    source = ImageFile(name, post_image_storage)
+    _state.generating = True
+    try:
+        for geometry, options in settings.POST_THUMBNAIL_SIZES:
+            default.backend.get_thumbnail(source, geometry, **options)
+    finally:
+        _state.generating = False
+    return name
+
+
+def _build_in_background(name):
+    try:
+        build_thumbnails(name)
+    except Exception:
+        logger.exception('Не удалось построить миниатюры %s', name)
+    finally:
+        with _executor_lock:
+            _in_flight.discard(name)
+
+
+def schedule_thumbnails(name):
+    """Ставит построение миниатюр в фоновый пул после коммита."""
+    if name:
+        transaction.on_commit(lambda: _submit(name))
+
+
+def _submit(name):
+    global _executor
+    with _executor_lock:
+        if name in _in_flight:
+            return
+        _in_flight.add(name)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    _executor.submit(_build_in_background, name)
+
+
+def stop_builders():
+    """Дожидается задач пула и останавливает его; следующая создаст новый."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
@@ -30,6 +30,11 @@ urlpatterns = [
         views.post_detail,
         name='post_detail'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comments,
+        name='comments'
+    ),
     path(
         'profile/<str:username>/',
         views.profile,
@@ -40,6 +45,26 @@ urlpatterns = [
         views.post_edit,
         name='post_edit'
     ),
+    path(
+        'feed/<str:feed_format>/',
+        views.index_feed,
+        name='feed'
+    ),
+    path(
+        'group/<slug:slug>/feed/<str:feed_format>/',
+        views.group_feed,
+        name='group_feed'
+    ),
+    path(
+        'profile/<str:username>/feed/<str:feed_format>/',
+        views.profile_feed,
+        name='profile_feed'
+    ),
+    path(
+        'search/',
+        views.search,
+        name='search'
+    ),
     path(
         'follow/',
         views.follow_index,
@@ -1,17 +1,151 @@
+import base64
+import binascii
+import json
+
 from django.core.paginator import Paginator
 from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 from yatube import settings
 
+CURSOR_PARAM = 'cursor'
+# Границы INTEGER в SQLite: число больше не привязать к запросу.
+MAX_INTEGER = 2 ** 63 - 1
+
+
+def pack_token(*values):
+    """Упаковывает значения в непрозрачный токен для адресной строки."""
+    raw = json.dumps(values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def unpack_token(token):
+    """Обратное pack_token; испорченный токен даёт ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    except binascii.Error as error:
+        raise ValueError(token) from error
+    return json.loads(raw)
+
+
+def parse_integer(value):
+    """Целое из токена в границах INTEGER, иначе ValueError."""
+    try:
+        value = int(value)
+    except OverflowError as error:
+        # JSON допускает Infinity.
+        raise ValueError(value) from error
+    if not -MAX_INTEGER - 1 <= value <= MAX_INTEGER:
+        raise ValueError(value)
+    return value
+
+
+def encode_cursor(created, pk, number, backwards=False):
+    """Упаковывает позицию в ленте в непрозрачный токен для ?cursor=."""
+    return pack_token(created.isoformat(), pk, number, backwards)
+
+
+def decode_cursor(token):
+    """Разбирает токен курсора, для испорченного токена возвращает None."""
+    try:
+        created, pk, number, backwards = unpack_token(token)
+        created = parse_datetime(created)
+        pk, number = parse_integer(pk), parse_integer(number)
+    except (ValueError, TypeError):
+        return None
+    if created is None or number < 1:
+        return None
+    return created, pk, number, bool(backwards)
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (created, pk) вместо OFFSET.
+
+    Страница выбирается одним запросом по индексу, а COUNT(*) выполняется
+    только если шаблон сам обращается к count или num_pages.
+    """
+
+    def __init__(self, object_list, per_page, created_field='created',
+                 **kwargs):
+        # created_field может быть аннотацией, если дата сортировки лежит
+        # в другой таблице, как у ленты подписок.
+        self.created_field = created_field
+        self.ordering = (f'-{created_field}', '-pk')
+        super().__init__(
+            object_list.order_by(*self.ordering), per_page, **kwargs
+        )
+
+    def _rows_after(self, created, pk):
+        field = self.created_field
+        return self.object_list.filter(
+            Q(**{f'{field}__lt': created})
+            | Q(**{field: created, 'pk__lt': pk})
+        )
+
+    def _rows_before(self, created, pk):
+        field = self.created_field
+        return self.object_list.filter(
+            Q(**{f'{field}__gt': created})
+            | Q(**{field: created, 'pk__gt': pk})
+        ).reverse()
+
+    def position(self, row):
+        """Ключ строки для токена курсора: дата и id."""
+        return getattr(row, self.created_field), row.pk
+
+    def cursor_page(self, cursor=None):
+        """Возвращает страницу и токены курсоров соседних страниц."""
+        position = decode_cursor(cursor) if cursor else None
+        if position is None:
+            number, backwards = 1, False
+            queryset = self.object_list
+        else:
+            created, pk, number, backwards = position
+            queryset = (
+                self._rows_before(created, pk) if backwards
+                else self._rows_after(created, pk)
+            )
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+            if not has_more:
+                number = 1
+        else:
+            has_next, has_previous = has_more, number > 1
+        page = self._get_page(rows, number, self)
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(*self.position(rows[-1]), number + 1)
+        if rows and has_previous:
+            previous_cursor = encode_cursor(
+                *self.position(rows[0]), number - 1, backwards=True
+            )
+        return page, next_cursor, previous_cursor
+
 
 def get_page_context(queryset,
                      request,
-                     posts_on_page=settings.LATEST_POSTS_COUNT
+                     posts_on_page=settings.LATEST_POSTS_COUNT,
+                     created_field='created'
                      ):
-    paginator = Paginator(queryset, posts_on_page)
+    paginator = CursorPaginator(queryset, posts_on_page, created_field)
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if page_number is not None:
+        # Совместимость со старыми ссылками вида ?page=N.
+        page_obj = paginator.get_page(page_number)
+        next_cursor = previous_cursor = None
+    else:
+        page_obj, next_cursor, previous_cursor = paginator.cursor_page(
+            request.GET.get(CURSOR_PARAM)
+        )
     return {
         'paginator': paginator,
         'page_number': page_number,
         'page_obj': page_obj,
+        'cursor_mode': page_number is None,
+        'next_cursor': next_cursor,
+        'previous_cursor': previous_cursor,
     }
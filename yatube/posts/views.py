@@ -1,54 +1,206 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.decorators.cache import cache_page
+from django.urls import reverse
 
+from core.reads import run_parallel
+from core.replicas import use_replica
+from core.writes import run_write
+
+from .caching import cache_feed, conditional_feed
+from .feed import FEED_CREATED, feed_posts
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
-from .utils import get_page_context
+from .models import Comment, Group, Post, User, Follow
+from .search import search_posts
+from .stats import find_stats, get_stats
+from .syndication import feed_class, feed_response
+from .utils import CURSOR_PARAM, CursorPaginator, get_page_context
 
 
-@cache_page(20, key_prefix='index_page')
+@use_replica
+@conditional_feed(lambda: ['index'])
+@cache_feed(lambda: ['index'])
 def index(request):
     template = 'posts/index.html'
-    context = get_page_context(Post.objects.all(), request)
+    context = get_page_context(Post.objects.for_feed(), request)
     return render(request, template, context)
 
 
+@use_replica
+@conditional_feed(lambda slug: [f'group:{slug}'])
+@cache_feed(lambda slug: [f'group:{slug}'])
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author', 'group')
+    group, page_context = run_parallel(
+        lambda: get_object_or_404(Group, slug=slug),
+        lambda: get_page_context(
+            Post.objects.filter(group__slug=slug).for_feed(), request
+        ),
+    )
     context = {
         'group': group,
     }
-    context.update(get_page_context(posts, request))
+    context.update(page_context)
     return render(request, template, context)
 
 
+@use_replica
+@conditional_feed(lambda username: [f'profile:{username}'])
+@cache_feed(lambda username: [f'profile:{username}'])
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('author', 'group')
-    following = request.user.is_authenticated and author.following.filter(
-        user=request.user
-    ).exists()
+    user = request.user
+    # Страница, подписка и счётчики читаются по имени автора параллельно.
+    author, page_context, following, stats = run_parallel(
+        lambda: get_object_or_404(User, username=username),
+        lambda: get_page_context(
+            Post.objects.filter(author__username=username).for_feed(),
+            request
+        ),
+        lambda: user.is_authenticated and Follow.objects.filter(
+            author__username=username, user=user
+        ).exists(),
+        lambda: find_stats(user__username=username),
+    )
     context = {
         'author': author,
+        'author_stats': stats or get_stats(author),
         'following': following,
     }
-    context.update(get_page_context(posts, request))
+    context.update(page_context)
     return render(request, template, context)
 
 
+def _comment_page(request, post_id):
+    """Страница комментариев поста по курсору из запроса."""
+    paginator = CursorPaginator(
+        Comment.objects.filter(post=post_id).select_related('author'),
+        settings.COMMENTS_PER_PAGE
+    )
+    page, next_cursor, _ = paginator.cursor_page(
+        request.GET.get(CURSOR_PARAM)
+    )
+    return {
+        'post_id': post_id,
+        'comments': page,
+        'comments_cursor': next_cursor,
+    }
+
+
+def _post_scopes(post_id):
+    """Области страницы поста: сам пост, профиль автора и группа."""
+    scopes = [f'post:{post_id}']
+    owner = Post.objects.filter(pk=post_id).values_list(
+        'author__username', 'group__slug'
+    ).first()
+    if owner is not None:
+        username, slug = owner
+        scopes.append(f'profile:{username}')
+        if slug:
+            scopes.append(f'group:{slug}')
+    return scopes
+
+
+@use_replica
+@conditional_feed(_post_scopes)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.select_related('author')
+    post, comment_page, stats = run_parallel(
+        lambda: get_object_or_404(
+            Post.objects.select_related('author', 'group'), pk=post_id
+        ),
+        lambda: _comment_page(request, post_id),
+        lambda: find_stats(user__posts=post_id),
+    )
     form = CommentForm()
     context = {
         'post': post,
+        'author_stats': stats or get_stats(post.author),
         'form': form,
-        'comments': comments,
+    }
+    context.update(comment_page)
+    return render(request, template, context)
+
+
+@use_replica
+@conditional_feed(lambda post_id: [f'post:{post_id}'])
+def comments(request, post_id):
+    """Фрагмент со следующей страницей комментариев для подгрузки."""
+    template = 'includes/comment_list.html'
+    _, comment_page = run_parallel(
+        lambda: get_object_or_404(Post.objects.only('pk'), pk=post_id),
+        lambda: _comment_page(request, post_id),
+    )
+    return render(request, template, comment_page)
+
+
+# Формат и владельца ленты проверяют внешние представления: до слоя
+# условных GET и кэша, чтобы несуществующей ленте ответить 404, а не 304.
+@use_replica
+def index_feed(request, feed_format):
+    feed_class(feed_format)
+    return _index_feed(request, feed_format)
+
+
+@conditional_feed(lambda feed_format: ['index'])
+def _index_feed(request, feed_format):
+    return feed_response(
+        request, feed_format, ['index'], Post.objects.all(),
+        title='Последние обновления на сайте',
+        link=reverse('posts:main_page'),
+    )
+
+
+@use_replica
+def group_feed(request, slug, feed_format):
+    feed_class(feed_format)
+    group = get_object_or_404(Group, slug=slug)
+    return _group_feed(request, group, feed_format)
+
+
+@conditional_feed(lambda group, feed_format: [f'group:{group.slug}'])
+def _group_feed(request, group, feed_format):
+    return feed_response(
+        request, feed_format, [f'group:{group.slug}'],
+        Post.objects.filter(group=group),
+        title=f'Записи сообщества {group.title}',
+        link=reverse('posts:group_list', args=[group.slug]),
+        description=group.description,
+    )
+
+
+@use_replica
+def profile_feed(request, username, feed_format):
+    feed_class(feed_format)
+    author = get_object_or_404(User, username=username)
+    return _profile_feed(request, author, feed_format)
+
+
+@conditional_feed(
+    lambda author, feed_format: [f'profile:{author.username}']
+)
+def _profile_feed(request, author, feed_format):
+    return feed_response(
+        request, feed_format, [f'profile:{author.username}'],
+        Post.objects.filter(author=author),
+        title=f'Записи {author.get_full_name() or author.username}',
+        link=reverse('posts:profile', args=[author.username]),
+    )
+
+
+@use_replica
+def search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    cursor = request.GET.get(CURSOR_PARAM)
+    posts, next_cursor = search_posts(
+        query, settings.LATEST_POSTS_COUNT, cursor
+    )
+    context = {
+        'query': query,
+        'page_obj': posts,
+        'cursor': cursor,
+        'next_cursor': next_cursor,
     }
     return render(request, template, context)
 
@@ -62,7 +214,7 @@ def post_create(request):
         return render(request, template, context)
     post = form.save(commit=False)
     post.author = request.user
-    post.save()
+    run_write(post.save)
     return redirect('posts:profile', post.author)
 
 
@@ -81,7 +233,7 @@ def post_edit(request, post_id):
     if request.user != post_id.author:
         return redirect('posts:post_detail', post_id=post_id.pk)
     if form.is_valid():
-        form.save()
+        run_write(form.save)
         return redirect('posts:post_detail', post_id=post_id.pk)
     return render(request, 'posts/create_post.html', context)
 
@@ -94,18 +246,21 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        run_write(comment.save)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
+@use_replica
 def follow_index(request):
     template = 'posts/follow.html'
-    post = Post.objects.filter(author__following__user=request.user)
+    post = feed_posts(request.user).for_feed()
     context = {
         'post': post,
     }
-    context.update(get_page_context(post, request))
+    context.update(get_page_context(
+        post, request, created_field=FEED_CREATED
+    ))
     return render(request, template, context)
 
 
@@ -113,7 +268,8 @@ def follow_index(request):
 def profile_follow(request, username):
     if username == request.user.username:
         return redirect('posts:profile', username)
-    Follow.objects.get_or_create(
+    run_write(
+        Follow.objects.get_or_create,
         user=request.user,
         author=get_object_or_404(
             User,
@@ -126,8 +282,8 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    Follow.objects.filter(
+    run_write(Follow.objects.filter(
         user=request.user,
         author=author
-    ).delete()
+    ).delete)
     return redirect('posts:profile', username)
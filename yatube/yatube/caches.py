@@ -0,0 +1,32 @@
+"""Сборка настроек CACHES из переменных окружения."""
+from django.core.exceptions import ImproperlyConfigured
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'pylibmc': 'django.core.cache.backends.memcached.PyLibMCCache',
+    # Требует пакет django-redis.
+    'redis': 'django_redis.cache.RedisCache',
+}
+MAX_ENTRIES = 10000
+
+
+def cache_config(backend='locmem', location='', key_prefix='yatube'):
+    """Возвращает словарь для CACHES по короткому имени бэкенда."""
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(
+            f'Неизвестный бэкенд кэша {backend!r}, '
+            f'доступны: {", ".join(BACKENDS)}'
+        )
+    if backend == 'file' and not location:
+        raise ImproperlyConfigured('Для файлового кэша нужен LOCATION')
+    config = {
+        'BACKEND': BACKENDS[backend],
+        'KEY_PREFIX': key_prefix,
+    }
+    if location:
+        config['LOCATION'] = location
+    if backend in ('locmem', 'file'):
+        config['OPTIONS'] = {'MAX_ENTRIES': MAX_ENTRIES}
+    return {'default': config}
@@ -0,0 +1,57 @@
+"""Сборка настроек DATABASES из переменных окружения."""
+REPLICA_ALIAS = 'replica_{}'
+# Профиль производительности SQLite: выполняется на каждом новом
+# соединении. WAL пускает читателей параллельно с писателем, NORMAL
+# синхронизирует диск только на контрольных точках WAL.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+
+
+def database_config(name, replicas=(), conn_max_age=0,
+                    health_checks=False, pool_size=0, tuned=False):
+    """Возвращает DATABASES: основная SQLite-база и её реплики.
+
+    conn_max_age держит соединение потока открытым между запросами,
+    health_checks перед запросом проверяет, что оно ещё живо. pool_size
+    включает пул соединений процесса; с ним соединение возвращается
+    в пул в конце каждого запроса, поэтому conn_max_age не нужен.
+    tuned включает SQLITE_PRAGMAS; их выполняет core.signals.
+    Реплики только читаются, поэтому в тестах они зеркалят default
+    и отдельные тестовые базы для них не создаются.
+    """
+    def database(database_name):
+        config = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': database_name,
+            'CONN_MAX_AGE': conn_max_age,
+            # Имя как у настройки Django 4.1; проверку делает core.signals.
+            'CONN_HEALTH_CHECKS': health_checks,
+        }
+        if tuned:
+            config['PRAGMAS'] = SQLITE_PRAGMAS
+        if pool_size:
+            config.update(
+                ENGINE='core.backends.sqlite3',
+                CONN_MAX_AGE=0,
+                POOL={'SIZE': pool_size},
+            )
+        return config
+
+    databases = {'default': database(name)}
+    for number, replica in enumerate(replicas):
+        databases[REPLICA_ALIAS.format(number)] = {
+            **database(replica),
+            'TEST': {'MIRROR': 'default'},
+        }
+    return databases
+
+
+def replica_aliases(databases):
+    """Псевдонимы реплик в том порядке, в каком их собрал database_config."""
+    return [alias for alias in databases if alias != 'default']
@@ -1,9 +1,25 @@
 import os
 
+from .caches import cache_config
+from .databases import database_config, replica_aliases
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 LATEST_POSTS_COUNT: int = 10
+# Комментариев на одной странице обсуждения поста.
+COMMENTS_PER_PAGE: int = 20
+# Размер страницы JSON API; клиент может задать ?limit= до максимума.
+API_PAGE_SIZE: int = 20
+API_MAX_PAGE_SIZE: int = 100
+# Постов в лентах Atom и RSS.
+SYNDICATION_ITEMS: int = 50
+
+# Лента подписок: авторы с большим числом подписчиков читаются напрямую,
+# а не раскладываются по лентам при публикации.
+FEED_FANOUT_LIMIT: int = 1000
+FEED_BACKFILL_LIMIT: int = 500
+FEED_BATCH_SIZE: int = 500
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
@@ -46,20 +62,87 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
 
     'sorl.thumbnail',
 
     'debug_toolbar'
 ]
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
-    }
+# YATUBE_CACHE_BACKEND: locmem, file, memcached, pylibmc или redis.
+# Между процессами кэш общий только у бэкендов, кроме locmem.
+CACHES = cache_config(
+    backend=os.environ.get('YATUBE_CACHE_BACKEND', 'locmem'),
+    location=os.environ.get('YATUBE_CACHE_LOCATION', ''),
+    key_prefix=os.environ.get('YATUBE_CACHE_PREFIX', 'yatube'),
+)
+
+# Отрендеренные карточки постов; ключ меняется при правке поста.
+POST_CARD_CACHE_TIMEOUT: int = 60 * 60 * 24
+
+# Поиск по постам: SQLiteFTSBackend требует SQLite с FTS5,
+# для других СУБД есть IContainsBackend.
+SEARCH_BACKEND = 'posts.search.SQLiteFTSBackend'
+
+# Миниатюры строятся в фоне; размеры должны совпадать с {% thumbnail %}
+# в шаблонах includes/post.html и posts/post_detail.html.
+THUMBNAIL_BACKEND = 'posts.thumbnails.DeferredThumbnailBackend'
+THUMBNAIL_KVSTORE = 'posts.thumbnails.CacheKVStore'
+POST_THUMBNAIL_SIZES = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+THUMBNAIL_WORKERS: int = 2
+
+# Картинки постов лежат под именами по хешу содержимого, см.
+# posts.storage; для объектного хранилища — класс с ContentAddressedMixin.
+POST_IMAGE_STORAGE: str = 'posts.storage.ContentAddressedStorage'
+
+# Загрузки пишутся во временный файл кусками, а не собираются в памяти.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+# Картинки постов после загрузки нормализует пул posts.images:
+# длинная сторона не больше POST_IMAGE_MAX_SIZE, копии для srcset.
+# WEBP доступен, если Pillow собран с libwebp.
+POST_IMAGE_FORMAT: str = 'JPEG'
+POST_IMAGE_QUALITY: int = 82
+POST_IMAGE_MAX_SIZE: int = 1920
+POST_IMAGE_WIDTHS = (480, 960)
+IMAGE_WORKERS: int = 2
+
+# Страницы лент живут до инвалидации сигналами; срок — страховка.
+# С locmem инвалидация не доходит до других процессов, и срок
+# ограничен FEED_CACHE_LOCAL_TIMEOUT.
+FEED_CACHE_TIMEOUT: int = 60 * 60
+FEED_CACHE_LOCAL_TIMEOUT: int = 20
+FEED_CACHE_LOCK_TIMEOUT: int = 10
+FEED_CACHE_BETA: float = 1.0
+
+# Профилирование запросов: доля профилируемых запросов. Они сверяются
+# с QUERY_BUDGETS, отдают Server-Timing при DEBUG или адресам INTERNAL_IPS
+# и попадают в PROFILING_LOG (по JSON-строке на запрос); отчёт строит
+# команда profiling_report. Без пути к файлу выборка не пишется.
+PROFILING_SAMPLE_RATE: float = float(
+    os.environ.get('YATUBE_PROFILING_SAMPLE_RATE', 0.01)
+)
+PROFILING_LOG = os.environ.get('YATUBE_PROFILING_LOG', '')
+# Сколько SQL-запросов может сделать представление, включая сессию
+# и пользователя; превышение в профилируемых запросах пишется в лог
+# yatube.profiling.
+QUERY_BUDGETS = {
+    'posts:main_page': 4,
+    'posts:group_list': 5,
+    'posts:profile': 7,
+    'posts:follow_index': 4,
+    'posts:post_detail': 7,
+    'posts:comments': 5,
+    'posts:search': 4,
 }
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.replicas.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -78,7 +161,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.profiling.ProfilingTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -100,12 +183,34 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
-}
+# YATUBE_DB_REPLICAS: пути к копиям базы через запятую. Ленты и страницы
+# постов читаются с реплик, запись и всё остальное идут в default.
+# YATUBE_DB_CONN_MAX_AGE: секунды жизни постоянного соединения потока,
+# YATUBE_DB_HEALTH_CHECKS=1 проверяет его перед каждым запросом.
+# YATUBE_DB_POOL_SIZE > 0 включает пул соединений для серверов,
+# которые создают поток на каждый запрос.
+DATABASES = database_config(
+    name=os.path.join(BASE_DIR, 'db.sqlite3'),
+    replicas=[
+        path for path in os.environ.get('YATUBE_DB_REPLICAS', '').split(',')
+        if path
+    ],
+    conn_max_age=int(os.environ.get('YATUBE_DB_CONN_MAX_AGE', 0)),
+    health_checks=os.environ.get('YATUBE_DB_HEALTH_CHECKS') == '1',
+    pool_size=int(os.environ.get('YATUBE_DB_POOL_SIZE', 0)),
+    tuned=os.environ.get('YATUBE_SQLITE_TUNING') == '1',
+)
+# YATUBE_SQLITE_TUNING=1 включает WAL и прочие PRAGMA из
+# yatube.databases.SQLITE_PRAGMAS и очередь записи core.writes.
+SQLITE_WRITE_QUEUE: bool = os.environ.get('YATUBE_SQLITE_TUNING') == '1'
+# Потоки для параллельных чтений страниц (core.reads); 0 — по очереди.
+PARALLEL_READ_WORKERS: int = int(
+    os.environ.get('YATUBE_PARALLEL_READ_WORKERS', 8)
+)
+DATABASE_REPLICAS = replica_aliases(DATABASES)
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+# Сколько секунд после своей записи пользователь читает с основной базы.
+REPLICA_PIN_SECONDS: int = 10
 
 
 # Password validation
@@ -145,5 +250,18 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.environ.get(
+    'YATUBE_STATIC_ROOT', os.path.join(BASE_DIR, 'collected_static')
+)
+# collectstatic добавляет хеш к именам и сжимает копии в gzip и brotli;
+# отдаёт их core.static.FileServer, обёртка из yatube/wsgi.py.
+STATICFILES_STORAGE = 'core.static.CompressedManifestStorage'
+# Кэш браузера для файлов без хеша в имени, секунды.
+STATIC_MAX_AGE: int = 60
+# Медиа может отдавать веб-сервер: 'x-accel-redirect' для nginx
+# (internal location MEDIA_ACCEL_PREFIX смотрит в MEDIA_ROOT) или
+# 'x-sendfile' для Apache; пусто — файл отдаёт FileServer.
+MEDIA_SENDFILE: str = os.environ.get('YATUBE_MEDIA_SENDFILE', '')
+MEDIA_ACCEL_PREFIX: str = '/internal-media/'
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'